@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger("BasePrices")
+
+# Base tokens taken at 1 USD, WBNB is priced from its pairs with them
+STABLECOINS = ("BUSD", "USDT")
+
+
+class BasePriceCache:
+    """
+    USD prices and decimals of the base tokens, shared by every enrichment
+    in the process so that pricing a token needs no RPC call of its own.
+
+    read_decimals() returns {base name: decimals} and is called until it
+    succeeds once. read_reserves() returns {stablecoin: (WBNB reserve,
+    stablecoin reserve)} as raw integers; WBNB is priced as the total
+    stablecoin reserve over the total WBNB reserve of those pairs, so the
+    deeper pool weighs more. A daemon thread re-reads the reserves every
+    refresh_interval seconds, and a price older than max_age counts as unknown.
+    """
+
+    def __init__(self, read_decimals, read_reserves, refresh_interval=3.0, max_age=60.0):
+        self.read_decimals = read_decimals
+        self.read_reserves = read_reserves
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.refreshes = 0
+        self.failures = 0
+        self._decimals = {}
+        self._prices = {}
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        decimals = self._decimals or self.read_decimals()
+        base_total = quote_total = 0.0
+        for stablecoin, reserves in self.read_reserves().items():
+            if not reserves or not reserves[0] or not reserves[1]:
+                continue
+            base_total += reserves[0] / 10 ** decimals["WBNB"]
+            quote_total += reserves[1] / 10 ** decimals[stablecoin]
+        prices = {stablecoin: 1.0 for stablecoin in STABLECOINS}
+        if base_total:
+            prices["WBNB"] = quote_total / base_total
+        with self._lock:
+            self._decimals = decimals
+            self._prices = prices
+            self._updated_at = time.monotonic()
+            self.refreshes += 1
+
+    def _refresh_logged(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error refreshing base token prices: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self._refresh_logged()
+
+    # The first caller reads the prices once, callers racing it wait, then the refresher takes over
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._refresh_logged()
+            self._thread = threading.Thread(target=self._run, name="base-price-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def age(self):
+        """Seconds since the last successful refresh, None before the first one."""
+        updated_at = self._updated_at
+        return None if updated_at is None else time.monotonic() - updated_at
+
+    def decimals(self, base_name):
+        self._ensure_started()
+        return self._decimals.get(base_name)
+
+    def usd_price(self, base_name):
+        self._ensure_started()
+        age = self.age()
+        if age is None or age > self.max_age:
+            return None
+        return self._prices.get(base_name)
@@ -1,8 +1,19 @@
 from web3 import Web3
-import requests
+from collections import OrderedDict
 import logging
 import os
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.ExplorerClient import ExplorerError
+from BlockchainDataPipeline.TransferSource import transfer_source
+from BlockchainDataPipeline.HolderLedger import is_airdrop, BURN_ADDRESS
+from BlockchainDataPipeline.RpcPool import RpcEndpointPool
+from BlockchainDataPipeline.ResultCache import TTLCache, MISSING
+from BlockchainDataPipeline.Metrics import instrumented, register_gauge
+from BlockchainDataPipeline.BasePrices import BasePriceCache, STABLECOINS
+from BlockchainDataPipeline.TaxProbe import TaxSimulator, tax_probe_abi, probe_names, detect_taxes
 
 
 load_dotenv(find_dotenv())
@@ -10,9 +21,18 @@ load_dotenv(find_dotenv())
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Binance Smart Chain node
-BSC_RPC = "https://bsc-dataseed.binance.org/"
-web3 = Web3(Web3.HTTPProvider(BSC_RPC))
+# Binance Smart Chain nodes, calls go to the healthiest one and fail over to the rest
+BSC_RPC_URLS = [
+    url.strip()
+    for url in os.getenv(
+        "BSC_RPC_URLS",
+        "https://bsc-dataseed.binance.org/,https://bsc-dataseed1.defibit.io/,https://bsc-dataseed1.ninicoin.io/",
+    ).split(",")
+    if url.strip()
+]
+RPC_HEDGE_AFTER = float(os.getenv("RPC_HEDGE_AFTER", "0")) or None
+rpc_pool = RpcEndpointPool(BSC_RPC_URLS, timeout=float(os.getenv("RPC_TIMEOUT", "10")), hedge_after=RPC_HEDGE_AFTER)
+web3 = Web3(rpc_pool)
 
 # ERC20 ABI (simplified)
 erc20_abi = [
@@ -53,6 +73,268 @@ erc20_abi = [
     },
 ]
 
+# PancakeSwap V2 factory, pairs are CREATE2 deployed by it with this init code hash
+PANCAKE_FACTORY_ADDRESS = Web3.to_checksum_address("0xca143ce32fe78f1f7019d7d551a6402fc5350c73")
+PANCAKE_INIT_CODE_HASH = bytes.fromhex("00fb7f630766e6a796048ea87d01acd3068e8ff67d078148a3fa3f4a84f69bd5")
+pair_abi = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"name": "_reserve0", "type": "uint112"},
+            {"name": "_reserve1", "type": "uint112"},
+            {"name": "_blockTimestampLast", "type": "uint32"},
+        ],
+        "type": "function",
+    },
+]
+
+# Common base tokens, in the order pairs are preferred
+BASE_TOKENS = {
+    "WBNB": Web3.to_checksum_address("0xbb4cdb9cbd36b01bd1cbaebf2de08d9173bc095c"),
+    "BUSD": Web3.to_checksum_address("0xe9e7cea3dedca5984780bafc599bd69add087d56"),
+    "USDT": Web3.to_checksum_address("0x55d398326f99059ff775485246999027b3197955"),
+}
+
+# Multicall3 is deployed at the same address on every EVM chain, BSC included
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xca11bde05977b3631167028862be2a173976ca11")
+multicall3_abi = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+]
+
+multicall_contract = web3.eth.contract(address=MULTICALL3_ADDRESS, abi=multicall3_abi)
+
+
+# Decode the return data of a single multicall entry, None if it failed
+def _decode_call_result(function_call, success, return_data):
+    if not success or not return_data:
+        return None
+    try:
+        output_types = [output["type"] for output in function_call.abi["outputs"]]
+        values = web3.codec.decode(output_types, return_data)
+    except Exception:
+        return None
+    return values[0] if len(values) == 1 else list(values)
+
+
+# Run many contract reads in one Multicall3 aggregate3 round trip
+def multicall(function_calls):
+    """
+    Each entry is a bound contract function, e.g. contract.functions.decimals().
+    Calls fail independently: a reverted or undecodable call comes back as None
+    instead of failing the whole batch.
+    """
+    if not function_calls:
+        return []
+    calls = [(call.address, True, call._encode_transaction_data()) for call in function_calls]
+    results = multicall_contract.functions.aggregate3(calls).call()
+    return [
+        _decode_call_result(call, success, return_data)
+        for call, (success, return_data) in zip(function_calls, results)
+    ]
+
+
+# Name, symbol and decimals never change, so they are cached for good:
+# an in-memory LRU in front of a SQLite file that survives restarts.
+# The tax getter a contract answers (see TaxProbe) never changes either.
+# totalSupply can change (mint/burn) and is cached with its own TTL.
+class TokenMetadataCache:
+    def __init__(self, path, max_entries=10000, total_supply_ttl=300):
+        self.max_entries = max_entries
+        self.total_supply_ttl = total_supply_ttl
+        self._memory = OrderedDict()
+        self._total_supply = {}
+        self._tax_getters = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS token_metadata ("
+            "address TEXT PRIMARY KEY, name TEXT, symbol TEXT, decimals INTEGER)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS tax_getters (address TEXT PRIMARY KEY, getter TEXT NOT NULL)")
+        self._db.commit()
+
+    def get_metadata(self, address):
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            metadata = self._memory.get(address)
+            if metadata is not None:
+                self._memory.move_to_end(address)
+                return metadata
+            row = self._db.execute(
+                "SELECT name, symbol, decimals FROM token_metadata WHERE address = ?", (address,)
+            ).fetchone()
+            if row is None:
+                return None
+            metadata = {"name": row[0], "symbol": row[1], "decimals": row[2]}
+            self._remember(address, metadata)
+            return metadata
+
+    def put_metadata(self, address, name, symbol, decimals):
+        address = Web3.to_checksum_address(address)
+        metadata = {"name": name, "symbol": symbol, "decimals": decimals}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO token_metadata (address, name, symbol, decimals) VALUES (?, ?, ?, ?)",
+                (address, name, symbol, decimals),
+            )
+            self._db.commit()
+            self._remember(address, metadata)
+
+    def get_tax_getter(self, address):
+        """Getter key detected for the contract, NO_TAX_GETTER if it has none, None if never probed."""
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            getter = self._tax_getters.get(address)
+            if getter is None:
+                row = self._db.execute("SELECT getter FROM tax_getters WHERE address = ?", (address,)).fetchone()
+                if row is None:
+                    return None
+                getter = self._tax_getters[address] = row[0]
+            return getter
+
+    def put_tax_getter(self, address, getter):
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO tax_getters (address, getter) VALUES (?, ?)", (address, getter))
+            self._db.commit()
+            self._tax_getters[address] = getter
+
+    def get_total_supply(self, address):
+        cached = self._total_supply.get(Web3.to_checksum_address(address))
+        if cached and time.monotonic() - cached[1] < self.total_supply_ttl:
+            return cached[0]
+        return None
+
+    def put_total_supply(self, address, total_supply_raw):
+        self._total_supply[Web3.to_checksum_address(address)] = (total_supply_raw, time.monotonic())
+
+    def _remember(self, address, metadata):
+        self._memory[address] = metadata
+        self._memory.move_to_end(address)
+        while len(self._memory) > self.max_entries:
+            evicted, _ = self._memory.popitem(last=False)
+            self._total_supply.pop(evicted, None)
+            self._tax_getters.pop(evicted, None)
+
+
+token_cache = TokenMetadataCache(
+    os.getenv("TOKEN_CACHE_PATH", "token_cache.db"),
+    max_entries=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    total_supply_ttl=float(os.getenv("TOTAL_SUPPLY_TTL", "300")),
+)
+
+# Short-lived cache of the volatile on-chain reads, keyed by field and address.
+# Reserves move with every swap, the burned balance now and then, taxes almost never.
+FIELD_TTLS = {
+    "reserves": float(os.getenv("RESERVES_TTL", "5")),
+    "burned": float(os.getenv("BURNED_TTL", "60")),
+    "tax": float(os.getenv("TAX_TTL", "3600")),
+}
+field_cache = TTLCache(max_entries=int(os.getenv("FIELD_CACHE_SIZE", "10000")))
+
+# Simulated buy/sell through the WBNB pair, one extra eth_call per token when used:
+# "off", "fallback" for tokens without a known tax getter, or "always"
+TAX_SIMULATION = os.getenv("TAX_SIMULATION", "off").lower()
+tax_simulator = TaxSimulator(
+    web3, MULTICALL3_ADDRESS, BASE_TOKENS["WBNB"], buy_amount=int(float(os.getenv("TAX_SIMULATION_BNB", "0.01")) * 10**18),
+)
+
+
+# Like multicall(), but takes and returns a {key: value} mapping
+def multicall_dict(named_calls):
+    return dict(zip(named_calls.keys(), multicall(list(named_calls.values()))))
+
+
+# Metadata calls for a token, skipped for whatever the cache already holds
+def _metadata_calls(contract):
+    calls = {}
+    if token_cache.get_metadata(contract.address) is None:
+        calls["name"] = contract.functions.name()
+        calls["symbol"] = contract.functions.symbol()
+        calls["decimals"] = contract.functions.decimals()
+    if token_cache.get_total_supply(contract.address) is None:
+        calls["totalSupply"] = contract.functions.totalSupply()
+    return calls
+
+
+# Combine cached metadata with freshly read values, caching the new reads
+def _resolve_metadata(contract, results):
+    metadata = token_cache.get_metadata(contract.address)
+    if metadata is None:
+        if results.get("decimals") is None:
+            raise ValueError("decimals() call failed")
+        token_cache.put_metadata(contract.address, results.get("name"), results.get("symbol"), results["decimals"])
+        metadata = {"name": results.get("name"), "symbol": results.get("symbol"), "decimals": results["decimals"]}
+
+    total_supply_raw = token_cache.get_total_supply(contract.address)
+    if total_supply_raw is None:
+        total_supply_raw = results.get("totalSupply")
+        if total_supply_raw is not None:
+            token_cache.put_total_supply(contract.address, total_supply_raw)
+    return metadata, total_supply_raw
+
+
+# Sort two token addresses the way the Pancake factory does (token0 < token1)
+def sort_tokens(token_a, token_b):
+    token_a = Web3.to_checksum_address(token_a)
+    token_b = Web3.to_checksum_address(token_b)
+    return (token_a, token_b) if int(token_a, 16) < int(token_b, 16) else (token_b, token_a)
+
+
+# Derive a pair address locally instead of asking factory.getPair over RPC
+def compute_pair_address(token_a, token_b, factory_address=PANCAKE_FACTORY_ADDRESS, init_code_hash=PANCAKE_INIT_CODE_HASH):
+    token0, token1 = sort_tokens(token_a, token_b)
+    salt = Web3.keccak(bytes.fromhex(token0[2:]) + bytes.fromhex(token1[2:]))
+    digest = Web3.keccak(b"\xff" + bytes.fromhex(factory_address[2:]) + salt + init_code_hash)
+    return Web3.to_checksum_address(digest[12:])
+
+
+# Candidate pairs of a token against each base token
+def resolve_pair_candidates(contract_address, base_tokens=None):
+    """
+    Returns (base_name, pair_address, token_is_token0) for every base token.
+    The pairs may not exist yet: a getReserves call on a missing pair returns
+    no data, which multicall() reports as None.
+    """
+    base_tokens = BASE_TOKENS if base_tokens is None else base_tokens
+    contract_address = Web3.to_checksum_address(contract_address)
+    return [
+        (
+            base_name,
+            compute_pair_address(contract_address, base_address),
+            sort_tokens(contract_address, base_address)[0] == contract_address,
+        )
+        for base_name, base_address in base_tokens.items()
+    ]
+
 
 # Load the token contract
 def load_token_contract(contract_address):
@@ -63,140 +345,249 @@ def load_token_contract(contract_address):
         print(f"Invalid contract address: {e}")
         return None
 
+# Build token data from raw name/symbol/decimals/totalSupply reads
+def _build_token_data(token_name, token_symbol, token_decimals, total_supply_raw):
+    if token_decimals is None or total_supply_raw is None:
+        raise ValueError("decimals() or totalSupply() call failed")
+    return {
+        "name": token_name,
+        "symbol": token_symbol,
+        "decimals": token_decimals,
+        "total_supply": total_supply_raw / (10 ** token_decimals),
+    }
+
+# Build liquidity data from a pair's reserves, priced in USD from the shared base price cache
+def _build_liquidity_data(base_name, reserves, token_data, token_is_token0=True):
+    reserve_token_raw, reserve_base_raw = (reserves[0], reserves[1]) if token_is_token0 else (reserves[1], reserves[0])
+    reserve_token = reserve_token_raw / (10 ** token_data["decimals"])
+    # 18 only until the base token's decimals have been read once
+    base_decimals = base_prices.decimals(base_name)
+    reserve_base = reserve_base_raw / (10 ** (18 if base_decimals is None else base_decimals))
+
+    token_price_base = reserve_base / reserve_token
+    market_cap = token_data["total_supply"] * token_price_base
+    base_price_usd = base_prices.usd_price(base_name)
+
+    return {
+        "base_token": base_name,
+        "liquidity_base": reserve_base,
+        "liquidity_token": reserve_token,
+        "market_cap_base": market_cap,
+        "liquidity_usd": None if base_price_usd is None else reserve_base * base_price_usd,
+        "market_cap_usd": None if base_price_usd is None else market_cap * base_price_usd,
+    }
+
+# Build tax info from the buy and sell tax in percent
+def _build_tax_info(buy_tax, sell_tax, source):
+    return {"buy_tax": buy_tax, "sell_tax": sell_tax, "total_tax": buy_tax + sell_tax, "source": source}
+
+# Tax getter calls for a contract: every known getter the first time, then only the one it answered
+def _tax_calls(contract):
+    tax_getter = token_cache.get_tax_getter(contract.address)
+    functions = web3.eth.contract(address=contract.address, abi=tax_probe_abi).functions
+    return tax_getter, {("tax", name): functions[name]() for name in probe_names(tax_getter)}
+
+# Simulated taxes through the token's WBNB pair, None without one or when the simulation fails
+def _simulate_taxes(contract_address, pair_candidates, pair_reserves):
+    for (base_name, _, token_is_token0), reserves in zip(pair_candidates, pair_reserves):
+        if base_name == "WBNB" and reserves and reserves[0] and reserves[1]:
+            reserve_token, reserve_wbnb = (reserves[0], reserves[1]) if token_is_token0 else (reserves[1], reserves[0])
+            try:
+                return tax_simulator.simulate(contract_address, reserve_wbnb, reserve_token)
+            except Exception as e:
+                logging.error(f"Error simulating taxes: {e}")
+                return None
+    return None
+
+# Tax info from the getter reads, or from a simulation depending on TAX_SIMULATION, None if unknown.
+# The fallback simulation also covers getters whose value is ambiguous without a denominator.
+def _resolve_tax_info(contract_address, tax_getter, results, pair_candidates, pair_reserves):
+    getter, buy_tax, sell_tax = detect_taxes({key[1]: value for key, value in results.items() if key[0] == "tax"})
+    if tax_getter is None or (getter and getter != tax_getter):
+        token_cache.put_tax_getter(contract_address, getter)
+    if TAX_SIMULATION == "always" or (TAX_SIMULATION == "fallback" and buy_tax is None):
+        simulated = _simulate_taxes(contract_address, pair_candidates, pair_reserves)
+        if simulated:
+            return _build_tax_info(*simulated, source="simulation")
+    if buy_tax is None:
+        return None
+    return _build_tax_info(buy_tax, sell_tax, source=getter)
+
+# Pick the first candidate pair that exists and holds liquidity
+def _find_liquidity(pair_candidates, pair_reserves, token_data):
+    for (base_name, pair_address, token_is_token0), reserves in zip(pair_candidates, pair_reserves):
+        if reserves and reserves[0] and reserves[1]:
+            print(f"Liquidity pair found: {base_name}")
+            return _build_liquidity_data(base_name, reserves, token_data, token_is_token0)
+    return None
+
+# getReserves calls for a list of pair candidates
+def _reserves_calls(pair_candidates):
+    return [
+        web3.eth.contract(address=pair_address, abi=pair_abi).functions.getReserves()
+        for _, pair_address, _ in pair_candidates
+    ]
+
+# Decimals of every base token, read once through the token metadata cache
+def _read_base_decimals():
+    contracts = {name: load_token_contract(address) for name, address in BASE_TOKENS.items()}
+    named_calls = {
+        (name, key): call for name, contract in contracts.items() for key, call in _metadata_calls(contract).items()
+    }
+    results = multicall_dict(named_calls) if named_calls else {}
+    decimals = {}
+    for name, contract in contracts.items():
+        reads = {key: value for (base_name, key), value in results.items() if base_name == name}
+        decimals[name] = _resolve_metadata(contract, reads)[0]["decimals"]
+    return decimals
+
+# WBNB/stablecoin pairs the WBNB price is read from, as (stablecoin, pair address, WBNB is token0)
+PRICE_PAIRS = resolve_pair_candidates(BASE_TOKENS["WBNB"], {name: BASE_TOKENS[name] for name in STABLECOINS})
+
+# Reserves of the price pairs as (WBNB reserve, stablecoin reserve)
+def _read_price_reserves():
+    reserves = multicall(_reserves_calls(PRICE_PAIRS))
+    return {
+        name: (pair_reserves[0], pair_reserves[1]) if wbnb_is_token0 else (pair_reserves[1], pair_reserves[0])
+        for (name, _, wbnb_is_token0), pair_reserves in zip(PRICE_PAIRS, reserves)
+        if pair_reserves
+    }
+
+# Process-wide USD prices of the base tokens, refreshed in the background
+base_prices = BasePriceCache(
+    _read_base_decimals,
+    _read_price_reserves,
+    refresh_interval=float(os.getenv("BASE_PRICE_REFRESH_INTERVAL", "3")),
+    max_age=float(os.getenv("BASE_PRICE_MAX_AGE", "60")),
+)
+register_gauge(
+    "base_price_age_seconds", "Seconds since the base token USD prices were refreshed.",
+    lambda: float("nan") if base_prices.age() is None else base_prices.age(),
+)
+
 # Fetch token data
+@instrumented()
 def fetch_token_data(token_contract):
     try:
-        token_name = token_contract.functions.name().call()
-        token_symbol = token_contract.functions.symbol().call()
-        token_decimals = token_contract.functions.decimals().call()
-        total_supply = token_contract.functions.totalSupply().call() / (10 ** token_decimals)
-
-        return {
-            "name": token_name,
-            "symbol": token_symbol,
-            "decimals": token_decimals,
-            "total_supply": total_supply,
-        }
+        results = multicall_dict(_metadata_calls(token_contract))
+        metadata, total_supply_raw = _resolve_metadata(token_contract, results)
+        return _build_token_data(metadata["name"], metadata["symbol"], metadata["decimals"], total_supply_raw)
     except Exception as e:
         print(f"Error fetching token data: {e}")
         return None
 
 # Fetch Liquidity and Market Cap
-def fetch_liquidity_and_market_cap(contract_address, token_data):
+@instrumented()
+def fetch_liquidity_and_market_cap(contract_address, token_data, base_tokens=None):
     try:
-        contract_address = Web3.to_checksum_address(contract_address)  # Convert to checksum format
-        pancake_factory_address = Web3.to_checksum_address("0xca143ce32fe78f1f7019d7d551a6402fc5350c73")
-        pancake_factory_abi = [
-            {
-                "constant": True,
-                "inputs": [
-                    {"name": "_tokenA", "type": "address"},
-                    {"name": "_tokenB", "type": "address"},
-                ],
-                "name": "getPair",
-                "outputs": [{"name": "pair", "type": "address"}],
-                "type": "function",
-            }
-        ]
-
-        # Common base tokens
-        base_tokens = {
-            "WBNB": Web3.to_checksum_address("0xbb4cdb9cbd36b01bd1cbaebf2de08d9173bc095c"),
-            "BUSD": Web3.to_checksum_address("0xe9e7cea3dedca5984780bafc599bd69add087d56"),
-            "USDT": Web3.to_checksum_address("0x55d398326f99059ff775485246999027b3197955"),
-        }
-
-        factory_contract = web3.eth.contract(address=pancake_factory_address, abi=pancake_factory_abi)
-
-        for base_name, base_address in base_tokens.items():
-            pair_address = factory_contract.functions.getPair(contract_address, base_address).call()
-            if pair_address != "0x0000000000000000000000000000000000000000":
-                print(f"Liquidity pair found: {base_name}")
-                pair_abi = [
-                    {
-                        "constant": True,
-                        "inputs": [],
-                        "name": "getReserves",
-                        "outputs": [
-                            {"name": "_reserve0", "type": "uint112"},
-                            {"name": "_reserve1", "type": "uint112"},
-                            {"name": "_blockTimestampLast", "type": "uint32"},
-                        ],
-                        "type": "function",
-                    },
-                ]
-                pair_contract = web3.eth.contract(address=pair_address, abi=pair_abi)
-                reserves = pair_contract.functions.getReserves().call()
-
-                reserve_token = reserves[0] / (10 ** token_data["decimals"])
-                reserve_base = reserves[1] / (10 ** 18)  # Assuming 18 decimals for base token
-
-                token_price_base = reserve_base / reserve_token
-                market_cap = token_data["total_supply"] * token_price_base
-
-                return {
-                    "base_token": base_name,
-                    "liquidity_base": reserve_base,
-                    "liquidity_token": reserve_token,
-                    "market_cap_base": market_cap,
-                }
+        pair_candidates = resolve_pair_candidates(contract_address, base_tokens)
+        pair_reserves = multicall(_reserves_calls(pair_candidates))
+        liquidity_data = _find_liquidity(pair_candidates, pair_reserves, token_data)
+        if liquidity_data:
+            return liquidity_data
 
         return "No liquidity pair found"
     except Exception as e:
         print(f"Error fetching liquidity and market cap: {e}")
         return None
 
+# Fetch token data, liquidity, burned tokens and taxes in one batched read
+@instrumented()
+def fetch_onchain_data(contract_address, burn_address=BURN_ADDRESS, base_tokens=None):
+    """
+    Replaces the separate fetch_token_data / fetch_liquidity_and_market_cap /
+    fetch_burned_tokens / fetch_tax_info round trips with one aggregate3 call.
+    Pair addresses are derived locally, so their reserves ride in the same call.
+    Reads still fresh in field_cache (see FIELD_TTLS) are left out of the batch.
+    """
+    contract = load_token_contract(contract_address)
+    if not contract:
+        return None
+    try:
+        functions = contract.functions
+        pair_candidates = resolve_pair_candidates(contract.address, base_tokens)
+        burned_key = ("burned", contract.address, burn_address.lower())
+        tax_key = ("tax", contract.address)
+        reserves_key = ("reserves",) + tuple(pair_address for _, pair_address, _ in pair_candidates)
+
+        # Only read what the field cache cannot answer
+        burned_raw = field_cache.get(burned_key)
+        tax_info = field_cache.get(tax_key)
+        pair_reserves = field_cache.get(reserves_key)
+        named_calls = _metadata_calls(contract)
+        if burned_raw is MISSING:
+            named_calls["burned"] = functions.balanceOf(Web3.to_checksum_address(burn_address))
+        if tax_info is MISSING:
+            tax_getter, tax_calls = _tax_calls(contract)
+            named_calls.update(tax_calls)
+        if pair_reserves is MISSING:
+            reserves_calls = _reserves_calls(pair_candidates)
+            named_calls.update({("reserves", index): call for index, call in enumerate(reserves_calls)})
+        results = multicall_dict(named_calls) if named_calls else {}
+
+        if burned_raw is MISSING:
+            burned_raw = results["burned"]
+            field_cache.set(burned_key, burned_raw, FIELD_TTLS["burned"])
+        if pair_reserves is MISSING:
+            pair_reserves = [results[("reserves", index)] for index in range(len(reserves_calls))]
+            field_cache.set(reserves_key, pair_reserves, FIELD_TTLS["reserves"])
+        if tax_info is MISSING:
+            tax_info = _resolve_tax_info(contract.address, tax_getter, results, pair_candidates, pair_reserves)
+            field_cache.set(tax_key, tax_info, FIELD_TTLS["tax"])
+
+        metadata, total_supply_raw = _resolve_metadata(contract, results)
+        token_decimals = metadata["decimals"]
+
+        token_data = _build_token_data(metadata["name"], metadata["symbol"], token_decimals, total_supply_raw)
+        liquidity_data = _find_liquidity(pair_candidates, pair_reserves, token_data)
+        if not liquidity_data:
+            logging.info("No liquidity pair found")
+
+        return {
+            "token_data": token_data,
+            "liquidity_data": liquidity_data,
+            "burned_tokens": burned_raw / (10 ** token_decimals) if burned_raw is not None else None,
+            "tax_info": tax_info,
+        }
+    except Exception as e:
+        logging.error(f"Error fetching on-chain data: {e}")
+        return None
 
-# Fetch Holders using BscScan API
-def fetch_holders(contract_address):
+
+# Fetch Holders from the shared holder ledger
+@instrumented()
+def fetch_holders(contract_address, ledger=None):
     try:
-        url = f"https://api.etherscan.io/v2/api?module=account&action=tokentx&contractaddress={contract_address}&chainid=56&apikey={os.getenv('API_KEY_ETHERSCAN')}"
-
-        # Log the API request
-        # logging.info(f"Making API request to: {url}")
-
-        response = requests.get(url).json()
-
-        # Log the full API response for debugging
-        # logging.info(f"API Response: {response}")
-
-        if response.get("status") == "1" and "result" in response:
-            transactions = response["result"]
-
-            # Log the number of transactions found
-            logging.info(f"Number of transactions found: {len(transactions)}")
-
-            if transactions:
-                # Extract unique holders
-                unique_holders = set(tx["to"] for tx in transactions if tx["to"] and tx["to"] != "0x0000000000000000000000000000000000000000")
-
-                # Log unique holders count
-                logging.info(f"Unique holders: {len(unique_holders)}")
-                return len(unique_holders)
-            else:
-                # No transactions mean 0 holders
-                logging.info("No transactions found. Returning 0 holders.")
-                return 0
-        else:
-            # Distinguish between no transactions and actual errors
-            error_message = response.get("message", "Unknown error")
-            if error_message == "No transactions found":
-                logging.info("No transactions found. Returning 0 holders.")
-                return 0
-            else:
-                logging.error(f"Error fetching holders data: {error_message}")
-                return f"Error fetching holders data: {error_message}"
+        if ledger is None:
+            ledger = transfer_source.ledger(contract_address)
+
+        # Log the number of transactions found
+        logging.info(f"Number of transactions found: {ledger.transfer_count}")
+
+        # Holders are addresses with a positive balance, zero and dead addresses excluded
+        logging.info(f"Unique holders: {ledger.holder_count}")
+        return ledger.holder_count
+    except ExplorerError as e:
+        logging.error(f"Error fetching holders data: {e}")
+        return None
     except Exception as e:
         logging.exception(f"Error fetching holders: {e}")
         return None
     
 # Fetch Burned Tokens
-def fetch_burned_tokens(contract_address, burn_address="0x000000000000000000000000000000000000dead"):
+@instrumented()
+def fetch_burned_tokens(contract_address, burn_address=BURN_ADDRESS):
     try:
         contract = load_token_contract(contract_address)
         if not contract:
             raise ValueError("Unable to load contract.")
-        burned = contract.functions.balanceOf(Web3.to_checksum_address(burn_address)).call() / (10 ** contract.functions.decimals().call())
+        calls = {"burned": contract.functions.balanceOf(Web3.to_checksum_address(burn_address))}
+        metadata = token_cache.get_metadata(contract.address)
+        if metadata is None:
+            calls["decimals"] = contract.functions.decimals()
+        results = multicall_dict(calls)
+        token_decimals = metadata["decimals"] if metadata else results["decimals"]
+        burned = results["burned"] / (10 ** token_decimals)
         return burned
     except Exception as e:
         logging.error(f"Error fetching burned tokens: {e}")
@@ -204,49 +595,34 @@ def fetch_burned_tokens(contract_address, burn_address="0x0000000000000000000000
 
 
 # Fetch Top 10 Holders
-def fetch_top_holders(contract_address):
+@instrumented()
+def fetch_top_holders(contract_address, ledger=None):
     try:
-        url = f"https://api.bscscan.com/api?module=account&action=tokentx&contractaddress={contract_address}&chainid=56&apikey={os.getenv('API_KEY_BSCSCAN')}"
-        response = requests.get(url).json()
-
-        if response.get("status") == "1" and "result" in response:
-            transactions = response["result"]
-            holder_balances = {}
-
-            for tx in transactions:
-                to_address = tx["to"]
-                from_address = tx["from"]
-                value = int(tx["value"]) / (10 ** int(tx["tokenDecimal"]))
-
-                # Update balances
-                holder_balances[to_address] = holder_balances.get(to_address, 0) + value
-                holder_balances[from_address] = holder_balances.get(from_address, 0) - value
-
-            # Sort and get top 10 holders
-            sorted_holders = sorted(holder_balances.items(), key=lambda x: x[1], reverse=True)
-            return [{"address": holder[0], "balance": holder[1]} for holder in sorted_holders[:10]]
-        else:
-            return []
+        if ledger is None:
+            ledger = transfer_source.ledger(contract_address)
+        return ledger.top_holders(10)
+    except ExplorerError as e:
+        logging.error(f"Error fetching top holders: {e}")
+        return None
     except Exception as e:
         logging.error(f"Error fetching top holders: {e}")
         return None
 
 
 # Fetch Taxes (Buy, Sell, Total)
+@instrumented()
 def fetch_tax_info(contract_address):
     try:
         contract = load_token_contract(contract_address)
         if not contract:
             raise ValueError("Unable to load contract.")
-        try:
-            buy_tax = contract.functions.buyTax().call()  # Replace with the actual function name
-            sell_tax = contract.functions.sellTax().call()  # Replace with the actual function name
-        except:
-            buy_tax = 0
-            sell_tax = 0
-            
-        total_tax = buy_tax + sell_tax
-        return {"buy_tax": buy_tax, "sell_tax": sell_tax, "total_tax": total_tax}
+        pair_candidates = resolve_pair_candidates(contract.address)
+        tax_getter, named_calls = _tax_calls(contract)
+        reserves_calls = _reserves_calls(pair_candidates)
+        named_calls.update({("reserves", index): call for index, call in enumerate(reserves_calls)})
+        results = multicall_dict(named_calls)
+        pair_reserves = [results[("reserves", index)] for index in range(len(reserves_calls))]
+        return _resolve_tax_info(contract.address, tax_getter, results, pair_candidates, pair_reserves)
     except Exception as e:
         logging.error(f"Error fetching tax info: {e}")
         return None
@@ -263,6 +639,7 @@ def estimate_gas(transaction):
 
 
 # Fetch Liquidity Percentage
+@instrumented()
 def fetch_liquidity_percentage(liquidity_data, total_supply):
     try:
         liquidity_base = liquidity_data.get("liquidity_base", 0)
@@ -278,7 +655,8 @@ def classify_airdrops(transactions):
     try:
         airdrops = []
         for tx in transactions:
-            if int(tx["value"]) < 1 * 10**int(tx["tokenDecimal"]) and int(tx["txreceipt_status"]) == 1:
+            # tokentx only lists successful transfers and has no txreceipt_status field
+            if is_airdrop(tx):
                 airdrops.append(tx)
         return airdrops
     except Exception as e:
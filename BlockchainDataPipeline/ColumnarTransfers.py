@@ -0,0 +1,126 @@
+from itertools import chain, repeat
+from operator import itemgetter
+import numpy as np
+
+
+# Raw values are split into base-1e9 limbs: a limb sum over a block of rows
+# stays below 2**53, so bincount's float64 weights add them up exactly
+LIMB_DIGITS = 9
+BLOCK_ROWS = 8_000_000
+
+
+def _value_limbs(values):
+    """
+    (rows, limbs) int64 matrix of decimal value strings, least significant limb first,
+    and the digit count of each value. NumPy right-aligns the digits with zero padding,
+    so byte column i of every row is the digit for the same power of ten.
+    """
+    raw = np.array(values, dtype="S")
+    width = raw.dtype.itemsize
+    width += -width % LIMB_DIGITS
+    digits = np.char.rjust(raw, width, b"0").view(np.uint8).reshape(len(values), width) - np.uint8(ord("0"))
+    powers = 10 ** np.arange(LIMB_DIGITS - 1, -1, -1, dtype=np.int64)
+    limbs = digits.reshape(len(values), width // LIMB_DIGITS, LIMB_DIGITS).astype(np.int64) @ powers
+    return limbs[:, ::-1], np.char.str_len(raw)
+
+
+def _address_ids(froms, tos):
+    """Dense ids per address, deduplicated by dict in C before any per-row work."""
+    ids = dict.fromkeys(chain(froms, tos))
+    canonical = {}
+    for address in ids:
+        ids[address] = canonical.setdefault(address.lower(), len(canonical))
+    from_ids = np.fromiter(map(ids.__getitem__, froms), dtype=np.int64, count=len(froms))
+    to_ids = np.fromiter(map(ids.__getitem__, tos), dtype=np.int64, count=len(tos))
+    return np.array(list(canonical)), from_ids, to_ids
+
+
+def _int_column(values):
+    """Integer column, collapsed to a scalar when every row holds the same value."""
+    distinct = set(values)
+    if len(distinct) == 1:
+        return np.int64(int(distinct.pop()))
+    return np.fromiter(map(int, values), dtype=np.int64, count=len(values))
+
+
+def to_columns(transactions):
+    """Turn tokentx records into arrays: address ids, value limbs, decimals and status."""
+    # Each field is read with map(itemgetter) so the per-row work stays in C
+    def field(key):
+        return list(map(itemgetter(key), transactions))
+
+    addresses, from_ids, to_ids = _address_ids(field("from"), field("to"))
+    limbs, value_digits = _value_limbs(field("value"))
+    return {
+        "addresses": addresses,
+        "from_ids": from_ids,
+        "to_ids": to_ids,
+        "limbs": limbs,
+        "value_digits": value_digits,
+        # One token per list, so these are nearly always a single value
+        "decimals": _int_column(field("tokenDecimal")),
+        "status": _int_column(list(map(dict.get, transactions, repeat("txreceipt_status"), repeat(1)))),
+    }
+
+
+def net_deltas(columns):
+    """Exact net raw balance change per address id, as Python ints."""
+    address_count = len(columns["addresses"])
+    limbs = columns["limbs"]
+    net = np.zeros(address_count, dtype=object)
+    for start in range(0, len(limbs), BLOCK_ROWS):
+        block = slice(start, start + BLOCK_ROWS)
+        for limb in range(limbs.shape[1]):
+            weights = limbs[block, limb]
+            received = np.bincount(columns["to_ids"][block], weights=weights, minlength=address_count)
+            sent = np.bincount(columns["from_ids"][block], weights=weights, minlength=address_count)
+            scale = 10 ** (LIMB_DIGITS * limb)
+            net += (received - sent).astype(np.int64).astype(object) * scale
+    return net
+
+
+def airdrop_mask(columns):
+    """Successful transfers of less than one whole token (value < 10 ** decimals)."""
+    # A value below 10 ** decimals has at most `decimals` digits, or is zero
+    is_zero = ~columns["limbs"].any(axis=1)
+    below_one_token = (columns["value_digits"] <= columns["decimals"]) | is_zero
+    return below_one_token & (columns["status"] == 1)
+
+
+def aggregate_transfers(transactions, excluded_addresses=(), limit=10):
+    """
+    Net balances, holder count, top holders and airdrop mask in one pass,
+    matching what HolderLedger and classify_airdrops compute row by row.
+    """
+    columns = to_columns(transactions)
+    net = net_deltas(columns)
+    addresses = columns["addresses"]
+
+    holder = net > 0
+    if excluded_addresses:
+        holder &= ~np.isin(addresses, list(excluded_addresses))
+    holder_ids = np.flatnonzero(holder)
+
+    # Rank on float approximations, then order the candidates exactly
+    approximate = net[holder_ids].astype(np.float64)
+    if len(holder_ids) > limit:
+        cutoff = np.partition(approximate, len(approximate) - limit)[len(approximate) - limit]
+        candidates = holder_ids[approximate >= cutoff * (1 - 1e-9)]
+    else:
+        candidates = holder_ids
+    ranked = sorted(((-net[i], str(addresses[i])) for i in candidates))[:limit]
+
+    scale = 10 ** int(transactions[0]["tokenDecimal"]) if transactions else 1
+    return {
+        "balances": dict(zip(addresses.tolist(), net.tolist())),
+        "holder_count": len(holder_ids),
+        "top_holders": [{"address": address, "balance": -negative / scale} for negative, address in ranked],
+        "airdrop_mask": airdrop_mask(columns),
+    }
+
+
+def classify_airdrops_columnar(transactions):
+    if not transactions:
+        return []
+    mask = airdrop_mask(to_columns(transactions))
+    return [tx for tx, is_airdrop in zip(transactions, mask) if is_airdrop]
@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class QueueFull(Exception):
+    pass
+
+
+class DurableQueue:
+    """
+    On-disk FIFO queue in SQLite (WAL mode) that survives process crashes.
+
+    put() blocks while the queue holds max_items (backpressure). get_batch()
+    leases items instead of removing them; they are only deleted by ack().
+    Items whose lease ran out, or that were leased when the process died,
+    are handed out again, so nothing is lost between enqueue and delivery.
+    """
+
+    def __init__(self, path, max_items=10000, lease_seconds=60):
+        self.max_items = max_items
+        self.lease_seconds = lease_seconds
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+            "enqueued_at REAL NOT NULL, leased_until REAL NOT NULL DEFAULT 0)"
+        )
+        # Leases held by a previous run are void, replay those items
+        self._db.execute("UPDATE queue SET leased_until = 0")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def size(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+
+    def put(self, item, timeout=None):
+        """Append an item, waiting up to timeout seconds for room (forever when None)."""
+        payload = json.dumps(item)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self._db.execute("SELECT COUNT(*) FROM queue").fetchone()[0] >= self.max_items:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise QueueFull(f"Queue is at its limit of {self.max_items} items")
+                self._changed.wait(remaining)
+            self._db.execute("INSERT INTO queue (payload, enqueued_at) VALUES (?, ?)", (payload, time.time()))
+            self._changed.notify_all()
+
+    def get_batch(self, max_items=100, timeout=None):
+        """Lease up to max_items as (id, item) pairs, waiting up to timeout seconds for the first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                now = time.time()
+                rows = self._db.execute(
+                    "SELECT id, payload FROM queue WHERE leased_until < ? ORDER BY id LIMIT ?",
+                    (now, max_items),
+                ).fetchall()
+                if rows:
+                    self._db.executemany(
+                        "UPDATE queue SET leased_until = ? WHERE id = ?",
+                        [(now + self.lease_seconds, row_id) for row_id, _ in rows],
+                    )
+                    return [(row_id, json.loads(payload)) for row_id, payload in rows]
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                # Also wake up in time to pick up expired leases
+                self._changed.wait(self.lease_seconds if remaining is None else min(remaining, self.lease_seconds))
+
+    def ack(self, ids):
+        """Delete delivered items in one transaction."""
+        if not ids:
+            return
+        with self._changed:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM queue WHERE id = ?", [(row_id,) for row_id in ids])
+            self._db.execute("COMMIT")
+            self._changed.notify_all()
+
+    def nack(self, ids):
+        """Give leased items back for immediate redelivery."""
+        if not ids:
+            return
+        with self._changed:
+            self._db.executemany("UPDATE queue SET leased_until = 0 WHERE id = ?", [(row_id,) for row_id in ids])
+            self._changed.notify_all()
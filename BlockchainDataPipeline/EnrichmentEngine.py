@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Tuple
+from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.BlockchainDataHandler import (
+    fetch_onchain_data,
+    fetch_holders,
+    fetch_top_holders,
+    fetch_liquidity_percentage,
+)
+from BlockchainDataPipeline.TransferSource import transfer_source
+from BlockchainDataPipeline.ResultCache import TTLCache, SingleFlight, MISSING
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("EnrichmentEngine")
+
+# Seconds a single step may take before its result is dropped from the enrichment
+DEFAULT_STEP_TIMEOUT = float(os.getenv("ENRICHMENT_STEP_TIMEOUT", "10"))
+
+# Shared by all enrichments. asyncio.run() would wait for its default executor on exit,
+# which lets a timed out step hold back the result it was dropped from.
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ENRICHMENT_THREADS", "16")),
+    thread_name_prefix="enrichment",
+)
+
+# Seconds a synced holder ledger is reused before the explorer is asked again
+LEDGER_RESULT_TTL = float(os.getenv("LEDGER_RESULT_TTL", "30"))
+
+# Step results by (step name, contract address), for steps that set a ttl
+step_cache = TTLCache(max_entries=int(os.getenv("STEP_CACHE_SIZE", "10000")))
+
+# Concurrent enrichments of the same contract share one run
+enrichments_in_flight = SingleFlight()
+
+
+@dataclass
+class EnrichmentStep:
+    """
+    One node of the enrichment graph.
+
+    func is called as func(contract_address, *results_of_depends_on) in a worker
+    thread. A step whose dependency failed or timed out is skipped and yields None.
+    A step reports failure by raising or returning None, never with an error
+    value. With ttl set, a successful result is reused for that many seconds; only
+    steps without dependencies should set it, since the key is the address alone.
+    """
+    name: str
+    func: Callable
+    depends_on: Tuple[str, ...] = ()
+    timeout: float = DEFAULT_STEP_TIMEOUT
+    ttl: float = 0
+
+
+@dataclass
+class EnrichmentResult:
+    results: dict = field(default_factory=dict)
+    failed: list = field(default_factory=list)
+    timed_out: list = field(default_factory=list)
+
+    def get(self, name, default=None):
+        value = self.results.get(name)
+        return default if value is None else value
+
+
+# Liquidity percentage needs the liquidity and total supply from the on-chain step
+def _liquidity_percentage_step(contract_address, onchain_data):
+    liquidity_data = onchain_data["liquidity_data"]
+    token_data = onchain_data["token_data"]
+    if liquidity_data and "liquidity_base" in liquidity_data and "total_supply" in token_data:
+        return fetch_liquidity_percentage(liquidity_data, token_data["total_supply"])
+    return None
+
+
+# The holder ledger is synced with the explorer once per enrichment, an explorer error fails
+# the step (and skips the ones reading it) rather than being cached as a result
+def _ledger_step(contract_address):
+    return transfer_source.ledger(contract_address)
+
+
+# Airdrops are collected by the same ledger holders are counted from
+def _airdrops_step(contract_address, ledger):
+    return ledger.airdrop_summary()
+
+
+DEFAULT_STEPS = [
+    EnrichmentStep("onchain", fetch_onchain_data),
+    EnrichmentStep("ledger", _ledger_step, ttl=LEDGER_RESULT_TTL),
+    EnrichmentStep("holders", fetch_holders, depends_on=("ledger",)),
+    EnrichmentStep("top_holders", fetch_top_holders, depends_on=("ledger",)),
+    EnrichmentStep("airdrops", _airdrops_step, depends_on=("ledger",)),
+    EnrichmentStep("liquidity_percentage", _liquidity_percentage_step, depends_on=("onchain",)),
+]
+
+
+# Make sure every dependency exists and the graph has no cycles
+def validate_steps(steps):
+    by_name = {step.name: step for step in steps}
+    if len(by_name) != len(steps):
+        raise ValueError("Enrichment step names must be unique")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Enrichment steps have a dependency cycle at '{name}'")
+        if name not in by_name:
+            raise ValueError(f"Unknown enrichment step dependency '{name}'")
+        visiting.add(name)
+        for dependency in by_name[name].depends_on:
+            visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+
+    for step in steps:
+        visit(step.name)
+
+
+async def _run_step(step, contract_address, tasks, result):
+    dependencies = [await tasks[name] for name in step.depends_on]
+    if any(dependency is None for dependency in dependencies):
+        logger.info(f"Skipping step '{step.name}': a dependency has no result")
+        return None
+    cache_key = (step.name, contract_address.lower())
+    if step.ttl:
+        cached = step_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+    try:
+        # The worker thread cannot be interrupted, on timeout its result is simply dropped
+        loop = asyncio.get_running_loop()
+        value = await asyncio.wait_for(
+            loop.run_in_executor(executor, step.func, contract_address, *dependencies),
+            timeout=step.timeout,
+        )
+        if step.ttl and value is not None:
+            step_cache.set(cache_key, value, step.ttl)
+        return value
+    except asyncio.TimeoutError:
+        logger.warning(f"Step '{step.name}' timed out after {step.timeout}s")
+        result.timed_out.append(step.name)
+    except Exception as e:
+        logger.error(f"Step '{step.name}' failed: {e}")
+        result.failed.append(step.name)
+    return None
+
+
+# Run all steps concurrently, each one as soon as its dependencies are done
+async def enrich(contract_address, steps=None):
+    steps = DEFAULT_STEPS if steps is None else steps
+    validate_steps(steps)
+
+    result = EnrichmentResult()
+    tasks = {}
+    for step in steps:
+        tasks[step.name] = asyncio.ensure_future(_run_step(step, contract_address, tasks, result))
+
+    values = await asyncio.gather(*tasks.values())
+    result.results = dict(zip(tasks.keys(), values))
+    return result
+
+
+# Blocking entry point for synchronous callers such as Pyrogram handlers.
+# Callers asking for a contract that is already being enriched get that result.
+def enrich_token(contract_address, steps=None):
+    key = (contract_address.lower(), None if steps is None else id(steps))
+    return enrichments_in_flight.do(key, lambda: asyncio.run(enrich(contract_address, steps)))
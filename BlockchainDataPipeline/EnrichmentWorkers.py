@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from bisect import insort
+from itertools import count
+from BlockchainDataPipeline.Metrics import Histogram, registry
+
+
+logger = logging.getLogger("EnrichmentWorkers")
+
+# Messages older than the queue's max_age are dropped, so waits stay under a few minutes
+queue_wait = registry.register(Histogram(
+    "enrichment_queue_wait_seconds", "Time messages spent in the enrichment queue before a worker took them.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+))
+
+
+class FreshnessQueue:
+    """
+    Bounded work queue that hands out the freshest message first.
+
+    A stale new-pair alert is worthless, so when the queue is full the oldest
+    message is dropped to make room, and messages older than max_age seconds
+    are discarded instead of being processed. on_drop(item), when set, is
+    called for every dropped item, outside the queue lock.
+    """
+
+    def __init__(self, max_items=200, max_age=120, on_drop=None):
+        self.max_items = max_items
+        self.max_age = max_age
+        self.on_drop = on_drop
+        self.dropped_overflow = 0
+        self.dropped_stale = 0
+        self._items = []  # (message_time, sequence, enqueued_at, item), oldest first
+        self._sequence = count()
+        self._not_empty = threading.Condition()
+
+    def __len__(self):
+        with self._not_empty:
+            return len(self._items)
+
+    def _dropped(self, items):
+        if self.on_drop is None:
+            return
+        for item in items:
+            try:
+                self.on_drop(item)
+            except Exception as e:
+                logger.error(f"Error handling a dropped message: {e}")
+
+    def put(self, item, message_time=None):
+        now = time.time()
+        message_time = now if message_time is None else message_time
+        if now - message_time > self.max_age:
+            self.dropped_stale += 1
+            logger.warning(f"Dropping message that is already {now - message_time:.0f}s old")
+            self._dropped([item])
+            return False
+        dropped = []
+        with self._not_empty:
+            insort(self._items, (message_time, next(self._sequence), time.monotonic(), item))
+            if len(self._items) > self.max_items:
+                dropped.append(self._items.pop(0)[3])
+                self.dropped_overflow += 1
+                logger.warning("Enrichment queue is full, dropped the oldest message")
+            self._not_empty.notify()
+        self._dropped(dropped)
+        return True
+
+    def get(self, timeout=None):
+        """Freshest item and its queue wait in seconds, or None on timeout."""
+        dropped = []
+        try:
+            with self._not_empty:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while True:
+                    while self._items:
+                        message_time, _, enqueued_at, item = self._items.pop()
+                        if time.time() - message_time > self.max_age:
+                            self.dropped_stale += 1
+                            dropped.append(item)
+                            continue
+                        return item, time.monotonic() - enqueued_at
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._not_empty.wait(remaining)
+        finally:
+            self._dropped(dropped)
+
+
+class EnrichmentWorkerPool:
+    """Fixed set of threads that drain a FreshnessQueue through handle(item)."""
+
+    def __init__(self, queue, handle, workers=4):
+        self.queue = queue
+        self.handle = handle
+        self.workers = workers
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"enrichment-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            next_item = self.queue.get(timeout=1)
+            if next_item is None:
+                continue
+            item, waited = next_item
+            queue_wait.observe(waited)
+            logger.info(f"Message waited {waited:.2f}s in the enrichment queue")
+            try:
+                self.handle(item)
+            except Exception as e:
+                logger.error(f"Error while enriching message: {e}", exc_info=True)
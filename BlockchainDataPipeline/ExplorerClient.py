@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.Metrics import record_outbound
+from BlockchainDataPipeline.ResultCache import SingleFlight
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("ExplorerClient")
+
+# Etherscan v2 multichain API, BSC is chain 56
+EXPLORER_API_URL = os.getenv("EXPLORER_API_URL", "https://api.etherscan.io/v2/api")
+
+
+class ExplorerError(Exception):
+    pass
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _is_rate_limited(response):
+    return response.get("status") == "0" and "rate limit" in str(response.get("result", "")).lower()
+
+
+class ExplorerClient:
+    """
+    Block explorer API client shared by every caller in the process.
+
+    One pooled session, one token bucket sized to the API key's calls per
+    second, bounded retries with exponential backoff when the explorer still
+    answers "Max rate limit reached", and identical queries that are already
+    in flight share a single HTTP request.
+    """
+
+    def __init__(self, api_url=EXPLORER_API_URL, api_key=None, rate_per_second=5, max_retries=4, backoff=0.5, timeout=15):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_second)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=20)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._in_flight = SingleFlight()
+
+    def get(self, params):
+        """JSON response of a GET with these query params (the API key is added here)."""
+        return self._in_flight.do(tuple(sorted(params.items())), self._get_with_retries, params)
+
+    def _get_with_retries(self, params):
+        params = dict(params, apikey=self.api_key)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RateLimited(f"HTTP {response.status_code}")
+                body = response.json()
+                if _is_rate_limited(body):
+                    raise RateLimited(body.get("result"))
+                record_outbound("explorer", self.api_url, params.get("action", ""), time.perf_counter() - start)
+                return body
+            except (RateLimited, requests.RequestException, ValueError) as e:
+                record_outbound("explorer", self.api_url, params.get("action", ""), time.perf_counter() - start, True)
+                if attempt == self.max_retries:
+                    raise ExplorerError(f"Explorer request failed after {attempt + 1} attempts: {e}") from e
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"Explorer request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+
+explorer_client = ExplorerClient(
+    api_key=os.getenv("API_KEY_ETHERSCAN") or os.getenv("API_KEY_BSCSCAN"),
+    rate_per_second=float(os.getenv("EXPLORER_RATE_LIMIT", "5")),
+)
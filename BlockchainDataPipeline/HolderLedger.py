@@ -0,0 +1,136 @@
+import os
+import threading
+from bisect import bisect_left, insort
+
+# NumPy is optional, without it batches are aggregated row by row
+try:
+    from BlockchainDataPipeline import ColumnarTransfers
+except ImportError:
+    ColumnarTransfers = None
+
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+BURN_ADDRESS = "0x000000000000000000000000000000000000dead"
+
+# Mints come from the zero address and burns go to the dead address, neither is a holder
+EXCLUDED_ADDRESSES = {ZERO_ADDRESS, BURN_ADDRESS}
+
+# Batches at least this large go through the vectorized path when NumPy is installed
+COLUMNAR_MIN_ROWS = int(os.getenv("COLUMNAR_MIN_ROWS", "2000"))
+
+
+# Transfers of less than one whole token that succeeded
+def is_airdrop(tx):
+    return int(tx["value"]) < 1 * 10**int(tx["tokenDecimal"]) and int(tx.get("txreceipt_status", 1)) == 1
+
+
+# Lowercased address per raw address string. str.lower() returns a fresh string that has to
+# be hashed again on every dict lookup, this hands back one shared (already hashed) copy
+class _Lowercase(dict):
+    def __missing__(self, address):
+        self[address] = lowered = address.lower()
+        return lowered
+
+
+class HolderLedger:
+    """
+    Running balances of one token, built from its tokentx records.
+
+    Balances are exact raw integers. Every positive balance is also kept in a
+    list sorted by balance, so top holders are a slice and the holder count
+    is a length instead of a full recomputation per message.
+    """
+
+    def __init__(self):
+        self.decimals = None
+        self.transfer_count = 0
+        self.airdrop_count = 0
+        self._airdrop_total = 0
+        self._airdrop_recipients = set()
+        self._balances = {}
+        self._ranked = []  # (-balance, address), positive balances only
+        self._lock = threading.Lock()
+
+    def apply(self, transactions):
+        if not transactions:
+            return
+        if ColumnarTransfers is not None and len(transactions) >= COLUMNAR_MIN_ROWS:
+            deltas, airdrops = self._aggregate_columnar(transactions)
+        else:
+            deltas, airdrops = self._aggregate(transactions)
+        with self._lock:
+            if self.decimals is None:
+                self.decimals = int(transactions[0]["tokenDecimal"])
+            if self._balances:
+                # Net the batch first so each address is re-ranked once
+                for address, delta in deltas:
+                    self._add(address, delta)
+            else:
+                self._load(deltas)
+            # Only the aggregates are kept, the raw records are never shipped
+            self.airdrop_count += len(airdrops)
+            self._airdrop_total += sum(int(tx["value"]) for tx in airdrops)
+            self._airdrop_recipients.update(tx["to"].lower() for tx in airdrops)
+            self.transfer_count += len(transactions)
+
+    @staticmethod
+    def _aggregate(transactions):
+        deltas = {}
+        airdrops = []
+        lowercase = _Lowercase()
+        for tx in transactions:
+            # Parsed once per row for both the balances and the airdrop check
+            value = int(tx["value"])
+            from_address, to_address = lowercase[tx["from"]], lowercase[tx["to"]]
+            deltas[from_address] = deltas.get(from_address, 0) - value
+            deltas[to_address] = deltas.get(to_address, 0) + value
+            if value < 10 ** int(tx["tokenDecimal"]) and int(tx.get("txreceipt_status", 1)) == 1:
+                airdrops.append(tx)
+        return deltas.items(), airdrops
+
+    @staticmethod
+    def _aggregate_columnar(transactions):
+        columns = ColumnarTransfers.to_columns(transactions)
+        deltas = zip(columns["addresses"].tolist(), ColumnarTransfers.net_deltas(columns).tolist())
+        mask = ColumnarTransfers.airdrop_mask(columns)
+        return deltas, [tx for tx, airdrop in zip(transactions, mask) if airdrop]
+
+    def _load(self, deltas):
+        # First batch of an empty ledger: one sort instead of an insort per address
+        self._balances = {address: delta for address, delta in deltas if delta and address not in EXCLUDED_ADDRESSES}
+        self._ranked = sorted((-balance, address) for address, balance in self._balances.items() if balance > 0)
+
+    def _add(self, address, delta):
+        if not delta or address in EXCLUDED_ADDRESSES:
+            return
+        old_balance = self._balances.get(address, 0)
+        new_balance = old_balance + delta
+        if old_balance > 0:
+            del self._ranked[bisect_left(self._ranked, (-old_balance, address))]
+        if new_balance > 0:
+            insort(self._ranked, (-new_balance, address))
+        if new_balance:
+            self._balances[address] = new_balance
+        else:
+            self._balances.pop(address, None)
+
+    @property
+    def holder_count(self):
+        return len(self._ranked)
+
+    def balance_of(self, address):
+        return self._balances.get(address.lower(), 0)
+
+    def top_holders(self, limit=10):
+        with self._lock:
+            top = self._ranked[:limit]
+        scale = 10 ** (self.decimals or 0)
+        return [{"address": address, "balance": -negative_balance / scale} for negative_balance, address in top]
+
+    def airdrop_summary(self):
+        with self._lock:
+            return {
+                "count": self.airdrop_count,
+                "total_amount": self._airdrop_total / 10 ** (self.decimals or 0),
+                "recipients": len(self._airdrop_recipients),
+            }
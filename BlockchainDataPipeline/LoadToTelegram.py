@@ -1,10 +1,18 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
-import requests
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from typing import Optional, Dict, List, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import httpx
 import logging
 import os
+import time
 from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.Metrics import Histogram, instrumented, record_outbound, register_gauge, registry, CONTENT_TYPE
+from BlockchainDataPipeline.WireFormat import (
+    TokenAlert, Liquidity, Taxes, Holder, Airdrops, ReserveUpdate, WireFormatError, alert_from_item, decode,
+)
 
 
 load_dotenv(find_dotenv())
@@ -12,60 +20,58 @@ load_dotenv(find_dotenv())
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("FastAPI_Telegram")
+# httpx logs full request URLs, which contain the bot token
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
-# FastAPI app
-app = FastAPI()
-
-# Data model for validation
-class TokenData(BaseModel):
-    token_pair: Optional[str]
-    initial_liquidity: Optional[str]
-    contract_address: Optional[str]
-    dextools_url: Optional[str]
-    token_data: Optional[Dict[str, Any]] = None
-    liquidity_data: Optional[Dict[str, Any]] = None
-    holders: Optional[int] = None
-    burned_tokens: Optional[float] = None
-    top_holders: Optional[List[Any]] = None
-    tax_info: Optional[Dict[str, Any]] = None
-    liquidity_percentage: Optional[float] = None
-    airdrops: Optional[List[Any]] = None
-
-
-def format_liquidity_data(ld: dict) -> str:
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# Request bodies by encoding, to see what the compact wire format saves
+request_bytes = registry.register(Histogram(
+    "loader_request_bytes", "Size of token alert request bodies as received.", ("encoding",),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+))
+
+
+def format_usd(value: Optional[float]) -> str:
+    """Format a dollar amount, N/A while the base token price is unknown."""
+    if value is None:
+        return "N/A"
+    return f"${value:,.2f}"
+
+def format_liquidity_data(liquidity: Optional[Liquidity]) -> str:
     """Return a human-readable string for liquidity data."""
-    if not ld:
+    if not liquidity:
         return "No liquidity data"
     return (
-        f"Base Token: {ld.get('base_token', 'N/A')}\n"
-        f"Liquidity Base: {ld.get('liquidity_base', 'N/A')}\n"
-        f"Liquidity Token: {ld.get('liquidity_token', 'N/A')}\n"
-        f"Market Cap Base: {ld.get('market_cap_base', 'N/A')}"
+        f"Base Token: {liquidity.base_token}\n"
+        f"Liquidity Base: {liquidity.liquidity_base}\n"
+        f"Liquidity Token: {liquidity.liquidity_token}\n"
+        f"Market Cap Base: {'N/A' if liquidity.market_cap_base is None else liquidity.market_cap_base}\n"
+        f"Liquidity USD: {format_usd(liquidity.liquidity_usd)}\n"
+        f"Market Cap USD: {format_usd(liquidity.market_cap_usd)}"
     )
 
-def format_tax_info(tax: dict) -> str:
+def format_tax_info(taxes: Optional[Taxes]) -> str:
     """Return a human-readable string for tax info."""
-    if not tax:
+    if not taxes:
         return "No tax info"
     return (
-        f"Buy Tax: {tax.get('buy_tax', 'N/A')}%\n"
-        f"Sell Tax: {tax.get('sell_tax', 'N/A')}%\n"
-        f"Total Tax: {tax.get('total_tax', 'N/A')}%"
+        f"Buy Tax: {taxes.buy}%\n"
+        f"Sell Tax: {taxes.sell}%\n"
+        f"Total Tax: {taxes.total}%"
     )
 
-def format_top_holders(top_holders: list) -> str:
+def format_top_holders(top_holders: Tuple[Holder, ...]) -> str:
     """Return a human-readable string for top holders."""
     if not top_holders:
         return "No top holders"
-    # If top_holders is just a list of addresses or a list of dicts
-    return "\n".join(str(holder) for holder in top_holders)
+    return "\n".join(f"{holder.address}: {holder.balance}" for holder in top_holders)
 
-def format_airdrops(airdrops: list) -> str:
+def format_airdrops(airdrops: Airdrops) -> str:
     """Return a user-friendly string for airdrops."""
-    if not airdrops:
+    if not airdrops.count:
         return "0"  # show zero instead of empty
-    # If you need to list them, e.g. 'user1, user2'
-    return ", ".join(str(a) for a in airdrops)
+    return f"{airdrops.count} ({airdrops.total_amount} tokens to {airdrops.recipients} wallets)"
 
 def format_liquidity_percentage(value: float) -> str:
     """Format the liquidity percentage to avoid scientific notation."""
@@ -74,66 +80,403 @@ def format_liquidity_percentage(value: float) -> str:
     # For instance, show up to 8 decimal places or fewer:
     return f"{value:.8f}%"
 
+# Function to build the Telegram message for one token
+def format_token_message(alert: TokenAlert) -> str:
+    """Render one TokenAlert as the Markdown text posted to the chat."""
+    # 1. Format each piece
+    liquidity_data_str = format_liquidity_data(alert.liquidity)
+    tax_info_str = format_tax_info(alert.taxes)
+    top_holders_str = format_top_holders(alert.top_holders)
+    airdrops_str = format_airdrops(alert.airdrops)
+
+    # 2. Format liquidity_percentage
+    liquidity_percentage_str = format_liquidity_percentage(alert.liquidity_percentage)
+
+    # 3. Build final message
+    holders = "N/A" if alert.holders is None else alert.holders
+    burned_tokens = "N/A" if alert.burned_tokens is None else alert.burned_tokens
+
+    return (
+        f"🚀 *Token Information:*\n\n"
+        f"🔹 *Liquidity Data:*\n{liquidity_data_str}\n\n"
+        f"🔹 *Holders:* {holders}\n"
+        f"🔹 *Burned Tokens:* {burned_tokens}\n"
+        f"🔹 *Top Holders:*\n{top_holders_str}\n\n"
+        f"🔹 *Tax Information:*\n{tax_info_str}\n\n"
+        f"🔹 Liquidity Percentage: {liquidity_percentage_str}\n"
+        f"🔹 Airdrops: {airdrops_str}\n"
+    )
+
+
+# Function to build the follow-up message for a pair whose reserves crossed a threshold
+def format_update_message(update: ReserveUpdate) -> str:
+    """Render one ReserveUpdate as the Markdown text posted to the chat."""
+    if update.kind == "liquidity_pulled":
+        headline = f"⚠️ *Liquidity pulled:* {(1 - update.change) * 100:.0f}% of the {update.base_token} removed"
+    else:
+        headline = f"📈 *Market cap x{update.change:.1f}* since the alert"
+    return (
+        f"{headline}\n\n"
+        f"🔹 Contract: `{update.contract_address}`\n"
+        f"🔹 Pair: `{update.pair_address}`\n"
+        f"🔹 Liquidity Base: {update.liquidity_base} {update.base_token}\n"
+        f"🔹 Market Cap Base: {update.market_cap_base} {update.base_token}\n"
+        f"🔹 Market Cap USD: {format_usd(update.market_cap_usd)}\n"
+    )
+
+
+class TelegramRetryAfter(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Telegram asked to retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
 # Function to send message to Telegram
-def send_message_to_telegram(data: dict):
+@instrumented(is_error=None)
+async def send_message_to_telegram(client: httpx.AsyncClient, chat_id: str, text: str):
+    url = f"{TELEGRAM_API_URL}/bot{os.getenv('BOT_TG_TOKEN')}/sendMessage"
+    payload = {
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": "Markdown"
+    }
+
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=payload)
+    except httpx.HTTPError:
+        record_outbound("telegram", TELEGRAM_API_URL, "sendMessage", time.perf_counter() - start, True)
+        raise
+    record_outbound("telegram", TELEGRAM_API_URL, "sendMessage", time.perf_counter() - start, response.status_code != 200)
+    if response.status_code == 200:
+        logger.info("Message sent successfully to Telegram.")
+        return
+    if response.status_code == 429:
+        retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+        raise TelegramRetryAfter(float(retry_after))
+    logger.error(f"Failed to send message: {response.text}")
+    response.raise_for_status()
+    raise RuntimeError(f"Telegram rejected the message: {response.text}")
+
+
+class AsyncTokenBucket:
+    """`rate` sends per second with up to `burst` saved up, shared by every sender task."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Telegram rejects messages longer than this
+TELEGRAM_MESSAGE_LIMIT = 4096
+COALESCE_SEPARATOR = "\n" + "➖" * 10 + "\n\n"
+
+
+class MessageCoalescer:
     """
-    data is a dict produced by data.dict() in the FastAPI route.
-    It should match the fields of TokenData.
+    Packs token summaries for the same chat into one message.
+
+    The first summary opens a flush window; everything that arrives for that
+    chat within it is joined into one message, which is flushed early when
+    the next summary would take it past Telegram's 4096 characters.
     """
-    try:
-        # 1. Format each piece
-        liquidity_data_str = format_liquidity_data(data.get("liquidity_data") or {})
-        tax_info_str = format_tax_info(data.get("tax_info") or {})
-        top_holders_str = format_top_holders(data.get("top_holders") or [])
-        airdrops_str = format_airdrops(data.get("airdrops") or [])
-
-        # 2. Format liquidity_percentage
-        lp_value = data.get("liquidity_percentage", None)
-        liquidity_percentage_str = format_liquidity_percentage(lp_value)
-
-        # 3. Build final message
-        holders = data.get("holders", "N/A")
-        burned_tokens = data.get("burned_tokens", "N/A")
-
-        message_content = (
-            f"🚀 *Token Information:*\n\n"
-            f"🔹 *Liquidity Data:*\n{liquidity_data_str}\n\n"
-            f"🔹 *Holders:* {holders}\n"
-            f"🔹 *Burned Tokens:* {burned_tokens}\n"
-            f"🔹 *Top Holders:*\n{top_holders_str}\n\n"
-            f"🔹 *Tax Information:*\n{tax_info_str}\n\n"
-            f"🔹 Liquidity Percentage: {liquidity_percentage_str}\n"
-            f"🔹 Airdrops: {airdrops_str}\n"
-        )
-
-        # 4. Send via Telegram Bot API
-        url = f"https://api.telegram.org/bot{os.getenv('BOT_TG_TOKEN')}/sendMessage"
-        payload = {
-            "chat_id": os.getenv('CHAT_BOT_ID'),
-            "text": message_content,
-            "parse_mode": "Markdown"
-        }
 
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            logger.info("Message sent successfully to Telegram.")
+    def __init__(self, queue: asyncio.Queue, window: float, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        self.queue = queue
+        self.window = window
+        self.limit = limit
+        self.buffers: Dict[str, List[str]] = {}
+        self.timers: Dict[str, asyncio.Task] = {}
+
+    def buffered(self) -> int:
+        return sum(len(parts) for parts in self.buffers.values())
+
+    def add(self, chat_id: str, text: str):
+        parts = self.buffers.setdefault(chat_id, [])
+        if parts and len(COALESCE_SEPARATOR.join(parts + [text])) > self.limit:
+            self._flush(chat_id)
+            parts = self.buffers.setdefault(chat_id, [])
+        parts.append(text)
+        if chat_id not in self.timers:
+            self.timers[chat_id] = asyncio.create_task(self._flush_later(chat_id))
+
+    async def _flush_later(self, chat_id: str):
+        await asyncio.sleep(self.window)
+        self.timers.pop(chat_id, None)
+        parts = self.buffers.pop(chat_id, None)
+        if parts:
+            await self.queue.put((chat_id, COALESCE_SEPARATOR.join(parts), time.monotonic()))
+
+    def _flush(self, chat_id: str):
+        if self.queue.full():
+            raise asyncio.QueueFull()
+        timer = self.timers.pop(chat_id, None)
+        if timer:
+            timer.cancel()
+        parts = self.buffers.pop(chat_id, None)
+        if parts:
+            self.queue.put_nowait((chat_id, COALESCE_SEPARATOR.join(parts), time.monotonic()))
+
+    async def flush_all(self):
+        for chat_id in list(self.buffers):
+            timer = self.timers.pop(chat_id, None)
+            if timer:
+                timer.cancel()
+            await self.queue.put((chat_id, COALESCE_SEPARATOR.join(self.buffers.pop(chat_id)), time.monotonic()))
+
+
+class TelegramSender:
+    """
+    Background delivery of queued messages.
+
+    Requests only enqueue; sender tasks drain the queue through one pooled
+    HTTP client, keep to Telegram's global and per-chat send rates and wait
+    out retry_after when Telegram still answers 429. Connection errors and
+    5xx answers are retried after a backoff doubling from retry_backoff up
+    to max_backoff seconds. On stop, queued messages get drain_timeout
+    seconds to go out before the sender tasks are cancelled.
+    """
+
+    def __init__(self, max_queue: int, workers: int, global_rate: float, chat_rate: float, max_attempts: int = 5,
+                 coalesce_window: float = 0, retry_backoff: float = 0.5, max_backoff: float = 8.0, drain_timeout: float = 10.0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.coalescer = MessageCoalescer(self.queue, coalesce_window) if coalesce_window > 0 else None
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.drain_timeout = drain_timeout
+        self.chat_rate = chat_rate
+        self.global_bucket = AsyncTokenBucket(global_rate, burst=max(1, int(global_rate)))
+        self.chat_buckets: Dict[str, AsyncTokenBucket] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self.tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.queue_waits = deque(maxlen=1000)
+        self.send_latencies = deque(maxlen=1000)
+
+    async def start(self):
+        self.client = httpx.AsyncClient(timeout=15, limits=httpx.Limits(max_keepalive_connections=self.workers))
+        self.tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if self.coalescer:
+            await self.coalescer.flush_all()
+        try:
+            await asyncio.wait_for(self.queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Stopping with {self.queue.qsize()} messages still queued for Telegram")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.client.aclose()
+
+    # Each coalesced message can flush a full buffer, so count messages may take count queue slots either way
+    def has_room(self, count: int) -> bool:
+        return self.queue.maxsize - self.queue.qsize() >= count
+
+    def enqueue(self, chat_id: str, text: str):
+        """Raises asyncio.QueueFull when the backlog is at its limit."""
+        if self.queue.full():
+            raise asyncio.QueueFull()
+        if self.coalescer:
+            self.coalescer.add(chat_id, text)
         else:
-            logger.error(f"Failed to send message: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail=response.json())
+            self.queue.put_nowait((chat_id, text, time.monotonic()))
+
+    async def _run(self):
+        while True:
+            chat_id, text, queued_at = await self.queue.get()
+            try:
+                await self._deliver(chat_id, text, queued_at)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error sending data to Telegram: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, chat_id: str, text: str, queued_at: float):
+        chat_bucket = self.chat_buckets.setdefault(chat_id, AsyncTokenBucket(self.chat_rate))
+        for attempt in range(self.max_attempts):
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            started_at = time.monotonic()
+            if attempt == 0:
+                self.queue_waits.append(started_at - queued_at)
+            try:
+                await send_message_to_telegram(self.client, chat_id, text)
+            except TelegramRetryAfter as e:
+                logger.warning(f"{e}, attempt {attempt + 1} of {self.max_attempts}")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except httpx.HTTPStatusError as e:
+                # Any other 4xx will be rejected again
+                if e.response.status_code < 500:
+                    raise
+                logger.warning(f"Telegram answered {e.response.status_code}, attempt {attempt + 1} of {self.max_attempts}")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except httpx.TransportError as e:
+                logger.warning(f"Could not reach Telegram ({e!r}), attempt {attempt + 1} of {self.max_attempts}")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self.send_latencies.append(time.monotonic() - started_at)
+            self.sent += 1
+            return
+        raise RuntimeError(f"Gave up after {self.max_attempts} attempts")
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.max_backoff, self.retry_backoff * 2 ** attempt)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "coalescing": self.coalescer.buffered() if self.coalescer else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "queue_wait_seconds": _percentiles(self.queue_waits),
+            "send_latency_seconds": _percentiles(self.send_latencies),
+        }
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": None, "p99": None}
+    ordered = sorted(samples)
+    return {
+        "p50": ordered[len(ordered) // 2],
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+# Telegram allows about 30 messages per second overall and 20 per minute into one group
+sender = TelegramSender(
+    max_queue=int(os.getenv("TELEGRAM_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("TELEGRAM_SENDERS", "2")),
+    global_rate=float(os.getenv("TELEGRAM_GLOBAL_RATE", "30")),
+    chat_rate=float(os.getenv("TELEGRAM_CHAT_RATE", "0.33")),
+    coalesce_window=float(os.getenv("TELEGRAM_COALESCE_WINDOW", "0")),
+    drain_timeout=float(os.getenv("TELEGRAM_DRAIN_TIMEOUT", "10")),
+)
+
+
+register_gauge("telegram_queue_depth", "Messages waiting to be sent to Telegram.", lambda: sender.queue.qsize())
+register_gauge("telegram_messages_sent", "Messages delivered to Telegram.", lambda: sender.sent)
+register_gauge("telegram_messages_failed", "Messages Telegram never accepted.", lambda: sender.failed)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await sender.start()
+    yield
+    await sender.stop()
+
+
+# FastAPI app
+app = FastAPI(lifespan=lifespan)
+
+
+# Decode a JSON or msgpack body (optionally deflated) into alerts
+@instrumented(is_error=None)
+def parse_alerts(body: bytes, content_type: Optional[str], content_encoding: Optional[str], batch: bool) -> List[TokenAlert]:
+    payload = decode(body, content_type, content_encoding)
+    if not batch:
+        return [alert_from_item(payload)]
+    if not isinstance(payload, list):
+        raise WireFormatError("A batch must be a list of token alerts")
+    return [alert_from_item(item) for item in payload]
+
+
+async def read_alerts(request: Request, batch: bool) -> List[TokenAlert]:
+    body = await request.body()
+    content_type = request.headers.get("content-type")
+    request_bytes.observe(len(body), (content_type or "").split(";")[0])
+    try:
+        return parse_alerts(body, content_type, request.headers.get("content-encoding"), batch)
+    except WireFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    except Exception as e:
-        logger.error(f"Error sending data to Telegram: {e}")
-        raise HTTPException(status_code=500, detail="Failed to send message to Telegram")
 
 # FastAPI route
 @app.post("/send_to_telegram")
-async def send_to_telegram(data: TokenData):
+async def send_to_telegram(request: Request):
     logger.info("Received data to send to Telegram.")
+    (alert,) = await read_alerts(request, batch=False)
     try:
-        # Convert TokenData (Pydantic model) to a dict for easy handling
-        dict_data = data.dict()
-        send_message_to_telegram(dict_data)
-        return {"status": "success", "message": "Data sent to Telegram successfully"}
+        sender.enqueue(os.getenv('CHAT_BOT_ID'), format_token_message(alert))
+        return {"status": "queued", "message": "Data queued for Telegram", "queue_depth": sender.queue.qsize()}
+    except asyncio.QueueFull:
+        logger.error("Telegram queue is full, rejecting message.")
+        raise HTTPException(status_code=503, detail="Telegram queue is full")
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@app.post("/send_to_telegram/batch")
+async def send_to_telegram_batch(request: Request):
+    alerts = await read_alerts(request, batch=True)
+    logger.info(f"Received a batch of {len(alerts)} tokens to send to Telegram.")
+    # All or nothing, so a client retrying after 503 does not duplicate messages
+    if not sender.has_room(len(alerts)):
+        logger.error("Telegram queue has no room for the batch, rejecting it.")
+        raise HTTPException(status_code=503, detail="Telegram queue is full")
+    chat_id = os.getenv('CHAT_BOT_ID')
+    try:
+        # Format everything first so a bad alert rejects the batch before any of it is queued
+        messages = [format_token_message(alert) for alert in alerts]
+        for message in messages:
+            sender.enqueue(chat_id, message)
+        return {"status": "queued", "queued": len(alerts), "queue_depth": sender.queue.qsize()}
+    except asyncio.QueueFull:
+        logger.error("Telegram queue filled up during the batch, rejecting the rest.")
+        raise HTTPException(status_code=503, detail="Telegram queue is full")
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@instrumented(is_error=None)
+def parse_update(body: bytes, content_type: Optional[str], content_encoding: Optional[str]) -> ReserveUpdate:
+    return ReserveUpdate.from_row(decode(body, content_type, content_encoding))
+
+
+@app.post("/send_update")
+async def send_update(request: Request):
+    body = await request.body()
+    try:
+        update = parse_update(body, request.headers.get("content-type"), request.headers.get("content-encoding"))
+    except WireFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    logger.info(f"Received a {update.kind} update for {update.contract_address}.")
+    try:
+        sender.enqueue(os.getenv('CHAT_BOT_ID'), format_update_message(update))
+        return {"status": "queued", "queue_depth": sender.queue.qsize()}
+    except asyncio.QueueFull:
+        logger.error("Telegram queue is full, rejecting update.")
+        raise HTTPException(status_code=503, detail="Telegram queue is full")
+
+
+@app.get("/send_to_telegram/stats")
+async def send_to_telegram_stats():
+    return sender.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,60 @@
+import logging
+
+
+logger = logging.getLogger("LogRanges")
+
+# How nodes word a refused eth_getLogs range or an oversized result, as opposed to a rate limit or outage
+RANGE_ERROR_MARKERS = (
+    "block range",
+    "range too large",
+    "range is too",
+    "range exceeds",
+    "more than",
+    "response size",
+    "limited to a",
+    "too many logs",
+    "too many results",
+)
+
+
+def is_range_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in RANGE_ERROR_MARKERS)
+
+
+class LogRangeReader:
+    """
+    eth_getLogs over block ranges of up to max_range blocks.
+
+    A range the node refuses as too large is halved until it is accepted, and
+    that size is kept for the next calls; after grow_after accepted calls in a
+    row it is doubled again, up to max_range. Any other error is raised as is,
+    so a rate limit or an outage never narrows the range.
+    """
+
+    def __init__(self, web3, max_range, grow_after=10):
+        self.web3 = web3
+        self.max_range = max_range
+        self.grow_after = grow_after
+        self.range = max_range
+        self._accepted = 0
+
+    def get_logs(self, log_filter, from_block, to_block):
+        """(last block read, logs) for from_block up to at most to_block."""
+        to_block = min(to_block, from_block + self.range - 1)
+        while True:
+            try:
+                logs = self.web3.eth.get_logs({**log_filter, "fromBlock": from_block, "toBlock": to_block})
+            except Exception as e:
+                if to_block == from_block or not is_range_error(e):
+                    raise
+                to_block = from_block + (to_block - from_block) // 2
+                self.range = to_block - from_block + 1
+                self._accepted = 0
+                logger.warning(f"eth_getLogs range refused ({e}), retrying with {self.range} blocks")
+                continue
+            self._accepted += 1
+            if self.range < self.max_range and self._accepted >= self.grow_after:
+                self.range = min(self.max_range, self.range * 2)
+                self._accepted = 0
+            return to_block, logs
@@ -0,0 +1,202 @@
+import logging
+import os
+import sqlite3
+import threading
+from web3 import Web3
+from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.BlockchainDataHandler import web3, PANCAKE_FACTORY_ADDRESS, BASE_TOKENS
+from BlockchainDataPipeline.LogRanges import LogRangeReader
+from BlockchainDataPipeline.Metrics import register_gauge
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("PairDiscovery")
+
+PAIR_CREATED_TOPIC = Web3.keccak(text="PairCreated(address,address,address,uint256)")
+
+
+class CheckpointStore:
+    """
+    Scan progress as (block number, block hash) checkpoints in SQLite.
+
+    The hashes of the last `keep` scanned ranges let the watcher find where a
+    reorg forked off and rescan from there. Announced pairs are stored too, so
+    a rescan or a restart never announces the same pair twice.
+    """
+
+    def __init__(self, path, keep=128):
+        self.keep = keep
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS checkpoints (block_number INTEGER PRIMARY KEY, block_hash TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen_pairs (pair TEXT PRIMARY KEY, block_number INTEGER NOT NULL)")
+        self._lock = threading.Lock()
+
+    def last(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC LIMIT 1"
+            ).fetchone()
+
+    def checkpoints(self):
+        """All kept checkpoints, newest first."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+            ).fetchall()
+
+    def add(self, block_number, block_hash):
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)", (block_number, block_hash))
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (self.keep,),
+            )
+            oldest = self._db.execute("SELECT MIN(block_number) FROM checkpoints").fetchone()[0]
+            self._db.execute("DELETE FROM seen_pairs WHERE block_number < ?", (oldest,))
+            self._db.execute("COMMIT")
+
+    def rewind_to(self, block_number):
+        """Forget checkpoints after block_number, their pairs stay known."""
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE block_number > ?", (block_number,))
+
+    def mark_seen(self, pair, block_number):
+        """True the first time a pair address is seen."""
+        with self._lock:
+            cursor = self._db.execute("INSERT OR IGNORE INTO seen_pairs VALUES (?, ?)", (pair.lower(), block_number))
+            return cursor.rowcount == 1
+
+
+def _topic_address(topic):
+    return Web3.to_checksum_address("0x" + bytes(topic)[-20:].hex())
+
+
+class PairCreatedWatcher:
+    """
+    Polls the PancakeSwap factory for PairCreated logs and calls on_pair for
+    every new pair that has a base token (WBNB/BUSD/USDT) on one side.
+
+    Logs are read with eth_getLogs over block ranges of up to max_range,
+    narrowed while the node refuses them as too large. Before each poll the hash of
+    the last checkpoint is compared with the chain, and after a reorg the
+    scan resumes from the newest checkpoint still on the canonical chain.
+    """
+
+    def __init__(self, on_pair, store, factory_address=PANCAKE_FACTORY_ADDRESS, base_tokens=None,
+                 max_range=2000, confirmations=0, poll_interval=1.0, block_time=0.75, start_block=None,
+                 reorg_depth=64):
+        self.on_pair = on_pair
+        self.store = store
+        self.factory_address = Web3.to_checksum_address(factory_address)
+        self.base_tokens = {address: name for name, address in (base_tokens or BASE_TOKENS).items()}
+        self.log_reader = LogRangeReader(web3, max_range)
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.block_time = block_time
+        self.start_block = start_block
+        self.reorg_depth = reorg_depth
+        self.head = None
+        self.pairs_found = 0
+        self.reorgs = 0
+
+    def lag(self):
+        last = self.store.last()
+        if self.head is None or last is None:
+            return 0
+        return max(0, self.head - last[0])
+
+    def _block_hash(self, block_number):
+        return web3.eth.get_block(block_number)["hash"].hex()
+
+    # First block that still needs scanning, rewinding past a reorg if there was one
+    def _next_block(self, head):
+        last = self.store.last()
+        if last is None:
+            return head if self.start_block is None else self.start_block
+        block_number, block_hash = last
+        if self._block_hash(block_number) == block_hash:
+            return block_number + 1
+
+        self.reorgs += 1
+        checkpoints = self.store.checkpoints()
+        for block_number, block_hash in checkpoints[1:]:
+            if self._block_hash(block_number) == block_hash:
+                logger.warning(f"Chain reorganised, rescanning from block {block_number + 1}")
+                self.store.rewind_to(block_number)
+                return block_number + 1
+        # No kept checkpoint is canonical any more, go back a safe distance past the oldest
+        resume_block = max(0, checkpoints[-1][0] - self.reorg_depth)
+        logger.warning(f"Reorg deeper than the {len(checkpoints)} kept checkpoints, rescanning from block {resume_block}")
+        self.store.rewind_to(resume_block - 1)
+        self.start_block = resume_block
+        return resume_block
+
+    def _parse(self, log, to_block, to_block_time):
+        token0 = _topic_address(log["topics"][1])
+        token1 = _topic_address(log["topics"][2])
+        if token0 in self.base_tokens and token1 in self.base_tokens:
+            return None
+        token, base = (token1, token0) if token0 in self.base_tokens else (token0, token1)
+        if base not in self.base_tokens:
+            return None
+        block_number = log["blockNumber"]
+        return {
+            "pair_address": Web3.to_checksum_address("0x" + bytes(log["data"])[12:32].hex()),
+            "token_address": token,
+            "base_token": self.base_tokens[base],
+            "block_number": block_number,
+            # Estimated from the range's last block, saves fetching every block
+            "block_time": to_block_time - (to_block - block_number) * self.block_time,
+        }
+
+    def poll_once(self):
+        """Scan the next block range, returns the number of new pairs announced."""
+        self.head = web3.eth.block_number - self.confirmations
+        from_block = self._next_block(self.head)
+        if from_block > self.head:
+            return 0
+
+        to_block, logs = self.log_reader.get_logs(
+            {"address": self.factory_address, "topics": [PAIR_CREATED_TOPIC]}, from_block, self.head
+        )
+        last_block = web3.eth.get_block(to_block)
+        announced = 0
+        for log in logs:
+            if log.get("removed"):
+                continue
+            pair = self._parse(log, to_block, last_block["timestamp"])
+            if pair and self.store.mark_seen(pair["pair_address"], pair["block_number"]):
+                announced += 1
+                self.on_pair(pair)
+        self.store.add(to_block, last_block["hash"].hex())
+        self.pairs_found += announced
+        return announced
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Pair discovery poll failed: {e}")
+            # Keep polling without pause while catching up
+            if self.lag() == 0:
+                stop_event.wait(self.poll_interval)
+
+
+def create_watcher(on_pair):
+    start_block = os.getenv("PAIR_DISCOVERY_START_BLOCK")
+    watcher = PairCreatedWatcher(
+        on_pair,
+        CheckpointStore(os.getenv("PAIR_CHECKPOINT_PATH", "pair_discovery.db")),
+        max_range=int(os.getenv("PAIR_DISCOVERY_MAX_RANGE", "2000")),
+        confirmations=int(os.getenv("PAIR_DISCOVERY_CONFIRMATIONS", "0")),
+        poll_interval=float(os.getenv("PAIR_DISCOVERY_POLL_INTERVAL", "1")),
+        block_time=float(os.getenv("BSC_BLOCK_TIME", "0.75")),
+        start_block=int(start_block) if start_block else None,
+    )
+    register_gauge("pair_discovery_lag_blocks", "Blocks between the chain head and the last scanned block.", watcher.lag)
+    return watcher
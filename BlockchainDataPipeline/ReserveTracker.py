@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from web3 import Web3
+from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.BlockchainDataHandler import web3, BASE_TOKENS, base_prices, resolve_pair_candidates, token_cache
+from BlockchainDataPipeline.LogRanges import LogRangeReader
+from BlockchainDataPipeline.Metrics import register_gauge
+from BlockchainDataPipeline.WireFormat import ReserveUpdate
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("ReserveTracker")
+
+SYNC_TOPIC = Web3.keccak(text="Sync(uint112,uint112)")
+
+LIQUIDITY_PULLED = "liquidity_pulled"
+MARKET_CAP_MULTIPLE = "market_cap_multiple"
+
+
+@dataclass(slots=True)
+class WatchedPair:
+    contract_address: str
+    pair_address: str
+    base_token: str
+    token_is_token0: bool
+    token_decimals: int
+    base_decimals: int
+    total_supply: float
+    initial_liquidity_base: float
+    initial_market_cap_base: float
+    added_at: float
+    liquidity_base: float
+    market_cap_base: float
+    next_multiple: float
+
+
+class ReserveTracker:
+    """
+    Keeps the reserves, price and market cap of announced pairs current from
+    their Sync events, and calls on_update with a ReserveUpdate when one
+    crosses a threshold: liquidity falling below (1 - liquidity_drop) of what
+    was announced, or market cap reaching the next market_cap_multiple.
+
+    Each poll reads the new blocks with one eth_getLogs per max_addresses
+    watched pairs, whatever the number of swaps. Only the last Sync of a pair
+    in the range matters, as Sync carries the absolute reserves; for the same
+    reason a log dropped by a reorg is corrected by the pair's next Sync.
+    Pairs are forgotten after watch_for seconds, or once their liquidity was pulled.
+    """
+
+    def __init__(self, on_update, max_pairs=5000, watch_for=86400, max_addresses=500, max_range=500,
+                 confirmations=0, poll_interval=1.0, liquidity_drop=0.5, market_cap_multiple=2.0):
+        if market_cap_multiple <= 1:
+            raise ValueError("market_cap_multiple must be greater than 1")
+        self.on_update = on_update
+        self.max_pairs = max_pairs
+        self.watch_for = watch_for
+        self.max_addresses = max_addresses
+        self.log_reader = LogRangeReader(web3, max_range)
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.liquidity_drop = liquidity_drop
+        self.market_cap_multiple = market_cap_multiple
+        self.head = None
+        self.next_block = None
+        self.updates_sent = 0
+        self._pairs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def lag(self):
+        if self.head is None or self.next_block is None:
+            return 0
+        return max(0, self.head - self.next_block + 1)
+
+    def watch(self, contract_address, liquidity):
+        """Follow the pair an alert was sent for, from its announced Liquidity."""
+        if not liquidity or not liquidity.liquidity_base or not liquidity.liquidity_token:
+            return False
+        base_address = BASE_TOKENS.get(liquidity.base_token)
+        metadata = token_cache.get_metadata(contract_address)
+        if base_address is None or metadata is None or liquidity.market_cap_base is None:
+            return False
+        _, pair_address, token_is_token0 = resolve_pair_candidates(contract_address, {liquidity.base_token: base_address})[0]
+        base_decimals = base_prices.decimals(liquidity.base_token)
+        pair = WatchedPair(
+            contract_address=Web3.to_checksum_address(contract_address),
+            pair_address=pair_address,
+            base_token=liquidity.base_token,
+            token_is_token0=token_is_token0,
+            token_decimals=metadata["decimals"],
+            base_decimals=18 if base_decimals is None else base_decimals,
+            # The market cap is total supply times price, price is base over token reserve
+            total_supply=liquidity.market_cap_base * liquidity.liquidity_token / liquidity.liquidity_base,
+            initial_liquidity_base=liquidity.liquidity_base,
+            initial_market_cap_base=liquidity.market_cap_base,
+            added_at=time.monotonic(),
+            liquidity_base=liquidity.liquidity_base,
+            market_cap_base=liquidity.market_cap_base,
+            next_multiple=self.market_cap_multiple,
+        )
+        with self._lock:
+            if len(self._pairs) >= self.max_pairs and pair_address not in self._pairs:
+                # Make room by dropping the oldest pair
+                del self._pairs[next(iter(self._pairs))]
+            self._pairs[pair_address] = pair
+        return True
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.watch_for
+        with self._lock:
+            for pair_address in [address for address, pair in self._pairs.items() if pair.added_at < cutoff]:
+                del self._pairs[pair_address]
+
+    def _apply(self, pair, reserve0, reserve1):
+        """New reserves for a pair, returns the ReserveUpdate to send if a threshold was crossed."""
+        reserve_token_raw, reserve_base_raw = (reserve0, reserve1) if pair.token_is_token0 else (reserve1, reserve0)
+        pair.liquidity_base = reserve_base_raw / 10 ** pair.base_decimals
+        reserve_token = reserve_token_raw / 10 ** pair.token_decimals
+        pair.market_cap_base = pair.total_supply * pair.liquidity_base / reserve_token if reserve_token else 0.0
+
+        if pair.liquidity_base <= pair.initial_liquidity_base * (1 - self.liquidity_drop):
+            with self._lock:
+                self._pairs.pop(pair.pair_address, None)
+            return self._update(pair, LIQUIDITY_PULLED, pair.liquidity_base / pair.initial_liquidity_base)
+        multiple = pair.market_cap_base / pair.initial_market_cap_base if pair.initial_market_cap_base else 0.0
+        if multiple >= pair.next_multiple:
+            while multiple >= pair.next_multiple:
+                pair.next_multiple *= self.market_cap_multiple
+            return self._update(pair, MARKET_CAP_MULTIPLE, multiple)
+        return None
+
+    def _update(self, pair, kind, change):
+        base_price_usd = base_prices.usd_price(pair.base_token)
+        return ReserveUpdate(
+            contract_address=pair.contract_address,
+            pair_address=pair.pair_address,
+            kind=kind,
+            base_token=pair.base_token,
+            liquidity_base=pair.liquidity_base,
+            market_cap_base=pair.market_cap_base,
+            change=change,
+            market_cap_usd=None if base_price_usd is None else pair.market_cap_base * base_price_usd,
+        )
+
+    def poll_once(self):
+        """Apply the Sync events of the next block range, returns the number of updates sent."""
+        self._expire()
+        self.head = web3.eth.block_number - self.confirmations
+        if self.next_block is None:
+            # Watched pairs start from the reserves they were announced with
+            self.next_block = self.head
+        if self.next_block > self.head:
+            return 0
+        with self._lock:
+            addresses = list(self._pairs)
+        if not addresses:
+            self.next_block = self.head + 1
+            return 0
+
+        to_block = self.head
+        latest = {}
+        for start in range(0, len(addresses), self.max_addresses):
+            log_filter = {"address": addresses[start:start + self.max_addresses], "topics": [SYNC_TOPIC]}
+            to_block, logs = self.log_reader.get_logs(log_filter, self.next_block, to_block)
+            for log in logs:
+                if not log.get("removed"):
+                    latest[Web3.to_checksum_address(log["address"])] = log
+
+        updates = []
+        for pair_address, log in latest.items():
+            pair = self._pairs.get(pair_address)
+            if pair is None:
+                continue
+            data = bytes(log["data"])
+            update = self._apply(pair, int.from_bytes(data[:32], "big"), int.from_bytes(data[32:64], "big"))
+            if update:
+                updates.append(update)
+        self.next_block = to_block + 1
+
+        for update in updates:
+            try:
+                self.on_update(update)
+                self.updates_sent += 1
+            except Exception as e:
+                logger.error(f"Error sending reserve update for {update.contract_address}: {e}")
+        return len(updates)
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Reserve tracker poll failed: {e}")
+            # Keep polling without pause while catching up
+            if self.lag() == 0:
+                stop_event.wait(self.poll_interval)
+
+
+def create_tracker(on_update):
+    tracker = ReserveTracker(
+        on_update,
+        max_pairs=int(os.getenv("RESERVE_TRACKER_MAX_PAIRS", "5000")),
+        watch_for=float(os.getenv("RESERVE_TRACKER_WATCH_FOR", "86400")),
+        max_addresses=int(os.getenv("RESERVE_TRACKER_MAX_ADDRESSES", "500")),
+        max_range=int(os.getenv("RESERVE_TRACKER_MAX_RANGE", "500")),
+        confirmations=int(os.getenv("RESERVE_TRACKER_CONFIRMATIONS", "0")),
+        poll_interval=float(os.getenv("RESERVE_TRACKER_POLL_INTERVAL", "1")),
+        liquidity_drop=float(os.getenv("RESERVE_ALERT_LIQUIDITY_DROP", "0.5")),
+        market_cap_multiple=float(os.getenv("RESERVE_ALERT_MARKET_CAP_MULTIPLE", "2")),
+    )
+    register_gauge("reserve_tracker_pairs", "Pairs whose reserves are followed from Sync events.", lambda: len(tracker))
+    register_gauge("reserve_tracker_lag_blocks", "Blocks between the chain head and the tracked reserves.", tracker.lag)
+    register_gauge("reserve_tracker_updates_sent", "Threshold updates sent to the loader.", lambda: tracker.updates_sent)
+    return tracker
@@ -0,0 +1,199 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers import JSONBaseProvider
+from BlockchainDataPipeline.LogRanges import is_range_error
+from BlockchainDataPipeline.Metrics import record_outbound
+
+
+logger = logging.getLogger("RpcPool")
+
+# Read-only methods that can safely be sent again to another endpoint
+IDEMPOTENT_METHODS = {
+    "eth_call",
+    "eth_getLogs",
+    "eth_blockNumber",
+    "eth_chainId",
+    "eth_getCode",
+    "eth_getBalance",
+    "eth_getBlockByNumber",
+    "eth_getBlockByHash",
+    "eth_getTransactionReceipt",
+    "eth_getTransactionCount",
+    "eth_estimateGas",
+    "eth_gasPrice",
+    "net_version",
+    "web3_clientVersion",
+}
+
+# JSON-RPC errors that mean the node is unhappy rather than the call itself failing
+ENDPOINT_ERROR_CODES = {-32005, -32603, 429}
+ENDPOINT_ERROR_MARKERS = ("limit", "timeout", "timed out", "too many", "unavailable")
+
+
+class EndpointError(Exception):
+    pass
+
+
+class RpcEndpoint:
+    """One JSON-RPC URL with a keep-alive session and latency/error EWMAs."""
+
+    def __init__(self, url, pool_size=20, alpha=0.2, error_half_life=30.0):
+        self.url = url
+        self.alpha = alpha
+        self.error_half_life = error_half_life
+        self.latency = None
+        self.error_rate = 0.0
+        self.updated_at = time.monotonic()
+        self.calls = 0
+        self.errors = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+
+    def record(self, latency, failed):
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            if not failed:
+                self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+            self.error_rate = self.alpha * failed + (1 - self.alpha) * self._decayed_error_rate()
+            self.updated_at = time.monotonic()
+
+    # Errors fade while an endpoint is not being used, so a recovered node gets traffic again
+    def _decayed_error_rate(self):
+        return self.error_rate * 0.5 ** ((time.monotonic() - self.updated_at) / self.error_half_life)
+
+    def score(self, error_penalty):
+        # Untried endpoints score 0 so each one gets probed early
+        return (self.latency or 0.0) + self._decayed_error_rate() * error_penalty
+
+
+def _is_endpoint_error(response):
+    error = response.get("error")
+    if not error:
+        return False
+    message = str(error.get("message", "")).lower()
+    # Reverts and oversized eth_getLogs ranges fail the same way on every node, -32005 included
+    if "revert" in message or is_range_error(message):
+        return False
+    return error.get("code") in ENDPOINT_ERROR_CODES or any(marker in message for marker in ENDPOINT_ERROR_MARKERS)
+
+
+class RpcEndpointPool(JSONBaseProvider):
+    """
+    web3 provider that spreads calls over several BSC RPC endpoints.
+
+    Each call goes to the endpoint with the best latency/error EWMA. Idempotent
+    reads are retried on the next best endpoint when one fails or rate limits.
+    With hedge_after set, a read still unanswered after that many seconds is
+    also sent to a second endpoint, and whichever answers first wins.
+
+    web3 validates every eth_call against eth_chainId, and the endpoints all
+    serve the same chain, so the first chain id answered is reused from then on.
+    """
+
+    def __init__(self, urls, timeout=10, max_attempts=3, hedge_after=None, error_penalty=5.0, **kwargs):
+        super().__init__(**kwargs)
+        if not urls:
+            raise ValueError("RpcEndpointPool needs at least one URL")
+        self.endpoints = [RpcEndpoint(url) for url in urls]
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.hedge_after = hedge_after
+        self.error_penalty = error_penalty
+        self._chain_id = None
+        self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rpc-hedge") if hedge_after else None
+
+    def __str__(self):
+        return f"RPC pool: {', '.join(endpoint.url for endpoint in self.endpoints)}"
+
+    def ranked_endpoints(self):
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score(self.error_penalty))
+
+    def _record(self, endpoint, method, start, failed):
+        latency = time.perf_counter() - start
+        endpoint.record(latency, failed)
+        record_outbound("rpc", endpoint.url, method, latency, failed)
+
+    def _post(self, endpoint, request_data, method):
+        start = time.perf_counter()
+        try:
+            raw_response = endpoint.session.post(
+                endpoint.url,
+                data=request_data,
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+            raw_response.raise_for_status()
+            response = self.decode_rpc_response(raw_response.content)
+        except Exception as e:
+            self._record(endpoint, method, start, True)
+            raise EndpointError(f"{endpoint.url}: {e}") from e
+        if _is_endpoint_error(response):
+            self._record(endpoint, method, start, True)
+            raise EndpointError(f"{endpoint.url}: {response['error']}")
+        self._record(endpoint, method, start, False)
+        return response
+
+    def _hedged_post(self, primary, secondary, request_data, method):
+        primary_future = self._hedge_executor.submit(self._post, primary, request_data, method)
+        done, _ = wait([primary_future], timeout=self.hedge_after)
+        if done:
+            try:
+                return primary_future.result()
+            except EndpointError as e:
+                logger.warning(f"RPC call failed, failing over to {secondary.url}: {e}")
+                return self._post(secondary, request_data, method)
+
+        logger.debug(f"Hedging slow call on {primary.url} with {secondary.url}")
+        pending = {primary_future, self._hedge_executor.submit(self._post, secondary, request_data, method)}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except EndpointError as e:
+                    last_error = e
+        raise last_error
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        if method == "eth_chainId":
+            return self._chain_id_request(request_data)
+        return self._send(method, request_data)
+
+    def _chain_id_request(self, request_data):
+        if self._chain_id is None:
+            response = self._send("eth_chainId", request_data)
+            if "result" not in response:
+                return response
+            self._chain_id = response["result"]
+        return {"jsonrpc": "2.0", "id": json.loads(request_data)["id"], "result": self._chain_id}
+
+    def _send(self, method, request_data):
+        endpoints = self.ranked_endpoints()
+        if method not in IDEMPOTENT_METHODS:
+            return self._post(endpoints[0], request_data, method)
+
+        last_error = None
+        attempts = endpoints[:self.max_attempts]
+        index = 0
+        while index < len(attempts):
+            hedged = self._hedge_executor is not None and index + 1 < len(attempts)
+            try:
+                if hedged:
+                    return self._hedged_post(attempts[index], attempts[index + 1], request_data, method)
+                return self._post(attempts[index], request_data, method)
+            except EndpointError as e:
+                logger.warning(f"RPC {method} failed, trying next endpoint: {e}")
+                last_error = e
+            index += 2 if hedged else 1
+        raise last_error
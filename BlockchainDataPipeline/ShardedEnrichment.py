@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.managers import BaseManager
+from dotenv import load_dotenv, find_dotenv
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("ShardedEnrichment")
+
+# host:port of the broker and the shared secret its connections are authenticated with.
+# Managers exchange pickles, so keep the broker on a private network.
+BROKER_ADDRESS = os.getenv("ENRICHMENT_BROKER", "")
+BROKER_AUTHKEY = os.getenv("ENRICHMENT_BROKER_AUTHKEY", "")
+SHARD_QUEUE_SIZE = int(os.getenv("SHARD_QUEUE_SIZE", "1000"))
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def shard_for(contract_address, shards):
+    """Shard owning a contract: the 64-bit hash space is split into equal ranges."""
+    digest = hashlib.blake2b(contract_address.lower().encode(), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") * shards) >> 64
+
+
+class BrokerManager(BaseManager):
+    pass
+
+
+BrokerManager.register("get_config")
+BrokerManager.register("get_shard_queue")
+BrokerManager.register("get_results")
+
+
+def serve_broker(address, authkey, shards, queue_size=SHARD_QUEUE_SIZE):
+    """
+    Stand-in for a message broker: one FIFO queue per shard plus a results
+    queue, reachable over TCP by the extractor and by workers on any host.
+    Blocks until the process is stopped.
+    """
+    shard_queues = [queue.Queue(maxsize=queue_size) for _ in range(shards)]
+    results = queue.Queue()
+    config = {"shards": shards}
+
+    class ServingManager(BaseManager):
+        pass
+
+    ServingManager.register("get_config", callable=lambda: config)
+    ServingManager.register("get_shard_queue", callable=lambda shard: shard_queues[shard])
+    ServingManager.register("get_results", callable=lambda: results)
+    manager = ServingManager(address=address, authkey=authkey)
+    logger.info(f"Broker for {shards} shards listening on {address[0]}:{address[1]}")
+    manager.get_server().serve_forever()
+
+
+def connect(address, authkey, retry_for=30):
+    deadline = time.monotonic() + retry_for
+    while True:
+        manager = BrokerManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+class ShardRouter:
+    """Extractor side: sends each parsed message to the queue of the shard owning its contract."""
+
+    def __init__(self, address, authkey, put_timeout=5):
+        self.manager = connect(address, authkey)
+        self.shards = self.manager.get_config().get("shards")
+        self.queues = [self.manager.get_shard_queue(shard) for shard in range(self.shards)]
+        self.put_timeout = put_timeout
+        self._lock = threading.Lock()
+
+    def route(self, extracted_data, message_time=None):
+        shard = shard_for(extracted_data['contract_address'], self.shards)
+        try:
+            # Proxies share one connection each, so calls through them are serialised
+            with self._lock:
+                self.queues[shard].put((extracted_data, message_time), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            logger.error(f"Shard {shard} queue is full, dropping {extracted_data['contract_address']}")
+            return False
+
+
+class OrderedExecutor:
+    """
+    Runs handle(item) on a thread pool while keeping items of the same key in
+    arrival order: an item waits until the previous one for its key is done.
+    """
+
+    def __init__(self, handle, threads=8):
+        self.handle = handle
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="shard-worker")
+        self.slots = threading.BoundedSemaphore(threads * 2)
+        self._waiting = {}  # key -> items queued behind the one in flight
+        self._lock = threading.Lock()
+
+    def submit(self, key, item):
+        """Blocks while threads * 2 items are in flight or waiting, so the broker keeps the backlog."""
+        self.slots.acquire()
+        with self._lock:
+            if key in self._waiting:
+                self._waiting[key].append(item)
+                return
+            self._waiting[key] = deque()
+        self.pool.submit(self._run, key, item)
+
+    def _run(self, key, item):
+        while True:
+            try:
+                self.handle(item)
+            except Exception as e:
+                logger.error(f"Error while enriching {key}: {e}", exc_info=True)
+            finally:
+                self.slots.release()
+            with self._lock:
+                waiting = self._waiting[key]
+                if not waiting:
+                    del self._waiting[key]
+                    return
+                item = waiting.popleft()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+def run_worker(address, authkey, shard, output="outbox", threads=8, stop_event=None):
+    """
+    Enrichment worker owning one shard. It has its own web3 client, explorer
+    session and caches, and publishes to its own outbox (or to the broker's
+    results queue with output="broker").
+    """
+    # Set before the pipeline modules read their configuration
+    os.environ["OUTBOX_PATH"] = os.getenv("OUTBOX_PATH", "outbox.db").replace(".db", f"-shard{shard}.db")
+    from BlockchainDataPipeline import TelegramExtractor
+
+    manager = connect(address, authkey)
+    shard_queue = manager.get_shard_queue(shard)
+    results = manager.get_results() if output == "broker" else None
+    results_lock = threading.Lock()
+    max_age = float(os.getenv("MAX_MESSAGE_AGE", "120"))
+    stop_event = stop_event or threading.Event()
+
+    def handle(item):
+        extracted_data, message_time = item
+        if message_time is not None and time.time() - message_time > max_age:
+            logger.warning(f"Dropping {extracted_data['contract_address']}, message is too old")
+            return
+        # This shard gets the contract from both the channel and the pair watcher
+        if TelegramExtractor.already_announced(extracted_data):
+            return
+        alert = TelegramExtractor.enrich_message(extracted_data)
+        if alert is None:
+            return
+        if results is None:
+            TelegramExtractor.publish_row(alert.to_row())
+            TelegramExtractor.track_alert(alert)
+        else:
+            with results_lock:
+                results.put(alert.to_row())
+        TelegramExtractor.settle_announcement(extracted_data, published=True)
+
+    forwarder = None
+    if results is None:
+        forwarder = threading.Thread(
+            target=TelegramExtractor.forward_results, args=(stop_event,), name="outbox-forwarder", daemon=True
+        )
+        forwarder.start()
+        # Each worker follows the pairs of the contracts its shard owns
+        TelegramExtractor.start_reserve_tracker(stop_event)
+
+    executor = OrderedExecutor(handle, threads)
+    logger.info(f"Worker for shard {shard} started")
+    try:
+        while not stop_event.is_set():
+            try:
+                item = shard_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            executor.submit(item[0]['contract_address'].lower(), item)
+    finally:
+        executor.shutdown()
+        stop_event.set()
+        if forwarder:
+            forwarder.join(timeout=5)
+
+
+def start_local(address, authkey, shards, output="outbox", threads=8):
+    """Broker and one worker process per shard on this host, returns the processes."""
+    context = multiprocessing.get_context("spawn")
+    broker = context.Process(target=serve_broker, args=(address, authkey, shards), name="enrichment-broker", daemon=True)
+    broker.start()
+    workers = [
+        context.Process(target=run_worker, args=(address, authkey, shard, output, threads),
+                        name=f"enrichment-shard-{shard}", daemon=True)
+        for shard in range(shards)
+    ]
+    for worker in workers:
+        worker.start()
+    return [broker] + workers
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Sharded enrichment: broker and workers")
+    parser.add_argument("role", choices=["broker", "worker", "local"])
+    parser.add_argument("--broker", default=BROKER_ADDRESS or "127.0.0.1:50000", help="host:port of the broker")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("ENRICHMENT_SHARDS", "4")))
+    parser.add_argument("--shard", type=int, help="shard served by this worker")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("SHARD_WORKER_THREADS", "8")))
+    args = parser.parse_args()
+    if not BROKER_AUTHKEY:
+        raise SystemExit("Set ENRICHMENT_BROKER_AUTHKEY to the broker's shared secret")
+    broker_address, authkey = parse_address(args.broker), BROKER_AUTHKEY.encode()
+
+    if args.role == "broker":
+        serve_broker(broker_address, authkey, args.shards)
+    elif args.role == "worker":
+        if args.shard is None:
+            raise SystemExit("--shard is required for a worker")
+        run_worker(broker_address, authkey, args.shard, threads=args.threads)
+    else:
+        processes = start_local(broker_address, authkey, args.shards, threads=args.threads)
+        for process in processes:
+            process.join()
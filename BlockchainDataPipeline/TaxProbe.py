@@ -0,0 +1,255 @@
+import logging
+from web3 import Web3
+
+
+logger = logging.getLogger("TaxProbe")
+
+# Tax getters tried in order, as (buy getter, sell getter); a lone fee getter applies both ways
+TAX_GETTERS = (
+    ("buyTax", "sellTax"),
+    ("_buyTax", "_sellTax"),
+    ("buyFee", "sellFee"),
+    ("_buyFee", "_sellFee"),
+    ("buyTotalFees", "sellTotalFees"),
+    ("totalBuyTax", "totalSellTax"),
+    ("totalBuyFee", "totalSellFee"),
+    ("totalFees", None),
+    ("_totalFees", None),
+    ("totalFee", None),
+    ("_totalFee", None),
+    ("taxFee", None),
+    ("_taxFee", None),
+)
+# What the tax getters are divided by, tried in order
+DENOMINATOR_GETTERS = ("feeDenominator", "_feeDenominator", "FEE_DENOMINATOR")
+PROBE_NAMES = tuple(dict.fromkeys(name for getters in TAX_GETTERS for name in getters if name)) + DENOMINATOR_GETTERS
+
+# Cached for contracts that answer none of the getters
+NO_TAX_GETTER = ""
+
+tax_probe_abi = [
+    {"constant": True, "inputs": [], "name": name, "outputs": [{"name": "", "type": "uint256"}], "type": "function"}
+    for name in PROBE_NAMES
+]
+
+PANCAKE_ROUTER_ADDRESS = Web3.to_checksum_address("0x10ed43c718714eb63d5aa57b78b54704e256024e")
+# Sender of the simulated swaps, its balance is overridden for the call
+SIMULATION_SENDER = Web3.to_checksum_address("0x00000000000000000000000000000000005a1e57")
+SWAP_DEADLINE = 2**63
+
+router_abi = [
+    {
+        "inputs": [{"name": "amountIn", "type": "uint256"}, {"name": "path", "type": "address[]"}],
+        "name": "getAmountsOut",
+        "outputs": [{"name": "amounts", "type": "uint256[]"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+        "name": "swapExactETHForTokensSupportingFeeOnTransferTokens",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+        "name": "swapExactTokensForTokensSupportingFeeOnTransferTokens",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+]
+
+token_abi = [
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "type": "function",
+    },
+    {
+        "constant": False,
+        "inputs": [{"name": "_spender", "type": "address"}, {"name": "_value", "type": "uint256"}],
+        "name": "approve",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function",
+    },
+]
+
+aggregate3_value_abi = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "value", "type": "uint256"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3Value",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+]
+
+
+def probe_names(tax_getter):
+    """Getters to call for a contract whose cached getter is tax_getter (None when never probed)."""
+    if tax_getter is None:
+        return PROBE_NAMES
+    names = tax_getter.split("/")
+    if tax_getter and len(names) < 3:
+        # Cached before denominators were probed
+        return tuple(name for name in names if name) + DENOMINATOR_GETTERS
+    return tuple(name for name in names if name)
+
+
+# A getter value in percent. Contracts divide by 100, 1000 or 10000 alike, so without the
+# contract's denominator only 0 is unambiguous: 5 may be 5%, 0.5% or 0.05%.
+def tax_percent(value, denominator=None):
+    if value is None:
+        return None
+    if not denominator:
+        return 0.0 if value == 0 else None
+    percent = value * 100 / denominator
+    return percent if percent <= 100 else None
+
+
+def detect_taxes(results):
+    """
+    (getter, buy tax, sell tax) from {getter name: value}, taking the first
+    getter pair in TAX_GETTERS that answered and the first denominator that
+    did. getter is the cache key, e.g. "buyFee/sellFee/feeDenominator" or
+    "totalFees//", and NO_TAX_GETTER when none answered. The taxes are None
+    when a getter answered but its value cannot be read as a percent.
+    """
+    denominator_getter = next((name for name in DENOMINATOR_GETTERS if results.get(name)), None)
+    denominator = results.get(denominator_getter) if denominator_getter else None
+    for buy_getter, sell_getter in TAX_GETTERS:
+        buy_value = results.get(buy_getter)
+        sell_value = buy_value if sell_getter is None else results.get(sell_getter)
+        if buy_value is None or sell_value is None:
+            continue
+        getter = f"{buy_getter}/{sell_getter or ''}/{denominator_getter or ''}"
+        buy_tax, sell_tax = tax_percent(buy_value, denominator), tax_percent(sell_value, denominator)
+        if buy_tax is None or sell_tax is None:
+            return getter, None, None
+        return getter, buy_tax, sell_tax
+    return NO_TAX_GETTER, None, None
+
+
+# PancakeSwap V2 output for an exact input, with its 0.25% fee
+def amount_out(amount_in, reserve_in, reserve_out):
+    amount_in_with_fee = amount_in * 9975
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+
+def _loss_percent(received, expected):
+    if not expected:
+        return None
+    return round(max(0.0, 1 - received / expected) * 100, 2)
+
+
+class TaxSimulator:
+    """
+    Measures buy and sell tax by trading through the token's WBNB pair
+    inside a single eth_call.
+
+    The trades are made by Multicall3 itself: aggregate3Value runs the calls
+    below in order, from the Multicall3 address, with the state of each call
+    visible to the next. The sender's balance is overridden so it can pay
+    for the buy, and nothing is ever sent on chain.
+
+        getAmountsOut, balanceOf, buy, balanceOf,
+        approve, getAmountsOut, WBNB balanceOf, sell, WBNB balanceOf
+
+    The sell is sized at half the expected buy output, computed from the
+    pair reserves the caller already has, so it fits in what was bought
+    unless the buy tax is above 50%, in which case nothing is reported.
+    """
+
+    def __init__(self, web3, multicall_address, wbnb_address, router_address=PANCAKE_ROUTER_ADDRESS, buy_amount=10**16):
+        self.web3 = web3
+        self.multicall_address = Web3.to_checksum_address(multicall_address)
+        self.multicall = web3.eth.contract(address=self.multicall_address, abi=aggregate3_value_abi)
+        self.router = web3.eth.contract(address=Web3.to_checksum_address(router_address), abi=router_abi)
+        self.wbnb = web3.eth.contract(address=Web3.to_checksum_address(wbnb_address), abi=token_abi)
+        self.buy_amount = buy_amount
+
+    def _decode(self, function_call, success, return_data):
+        if not success or not return_data:
+            return None
+        try:
+            values = self.web3.codec.decode([output["type"] for output in function_call.abi["outputs"]], return_data)
+        except Exception:
+            return None
+        return values[0] if len(values) == 1 else list(values)
+
+    def simulate(self, token_address, reserve_wbnb, reserve_token):
+        """(buy tax, sell tax) in percent, None when the buy cannot be measured. A sell that reverts counts as 100%."""
+        token = self.web3.eth.contract(address=Web3.to_checksum_address(token_address), abi=token_abi)
+        trader = self.multicall_address
+        buy_path, sell_path = [self.wbnb.address, token.address], [token.address, self.wbnb.address]
+        sell_amount = amount_out(self.buy_amount, reserve_wbnb, reserve_token) // 2
+        if not sell_amount:
+            return None
+
+        steps = [
+            (self.router.functions.getAmountsOut(self.buy_amount, buy_path), 0),
+            (token.functions.balanceOf(trader), 0),
+            (self.router.functions.swapExactETHForTokensSupportingFeeOnTransferTokens(
+                0, buy_path, trader, SWAP_DEADLINE), self.buy_amount),
+            (token.functions.balanceOf(trader), 0),
+            (token.functions.approve(self.router.address, sell_amount), 0),
+            (self.router.functions.getAmountsOut(sell_amount, sell_path), 0),
+            (self.wbnb.functions.balanceOf(trader), 0),
+            (self.router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
+                sell_amount, 0, sell_path, trader, SWAP_DEADLINE), 0),
+            (self.wbnb.functions.balanceOf(trader), 0),
+        ]
+        calls = [(call.address, True, value, call._encode_transaction_data()) for call, value in steps]
+        results = self.multicall.functions.aggregate3Value(calls).call(
+            {"from": SIMULATION_SENDER, "value": self.buy_amount},
+            state_override={SIMULATION_SENDER: {"balance": self.buy_amount * 2}},
+        )
+        (buy_amounts, tokens_before, bought, tokens_after, _, sell_amounts, wbnb_before, sold, wbnb_after) = [
+            self._decode(call, success, return_data) if call.abi["outputs"] else success
+            for (call, _), (success, return_data) in zip(steps, results)
+        ]
+
+        if not bought or None in (buy_amounts, tokens_before, tokens_after):
+            return None
+        buy_tax = _loss_percent(tokens_after - tokens_before, buy_amounts[-1])
+        if tokens_after - tokens_before < sell_amount:
+            logger.warning(f"Buy tax of {token.address} is {buy_tax}%, too high to size the simulated sell")
+            return None
+        if not sold or None in (sell_amounts, wbnb_before, wbnb_after):
+            return buy_tax, 100.0
+        return buy_tax, _loss_percent(wbnb_after - wbnb_before, sell_amounts[-1])
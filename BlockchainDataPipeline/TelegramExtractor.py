@@ -1,34 +1,140 @@
+import argparse
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv, find_dotenv
 import logging
 import re
+import threading
+import time
 import requests
 from pyrogram import Client, filters
-from BlockchainDataPipeline.BlockchainDataHandler import (
-    load_token_contract,
-    fetch_token_data,
-    fetch_liquidity_and_market_cap,
-    fetch_holders,
-    fetch_burned_tokens,
-    fetch_top_holders,
-    fetch_tax_info,
-    fetch_liquidity_percentage,
-    classify_airdrops
-)
+from BlockchainDataPipeline.DurableQueue import DurableQueue, QueueFull
+from BlockchainDataPipeline.EnrichmentEngine import enrich_token
+from BlockchainDataPipeline.EnrichmentWorkers import FreshnessQueue, EnrichmentWorkerPool
+from BlockchainDataPipeline.PairDiscovery import create_watcher
+from BlockchainDataPipeline.ReserveTracker import create_tracker
+from BlockchainDataPipeline.ShardedEnrichment import ShardRouter, BROKER_ADDRESS, BROKER_AUTHKEY, parse_address
+from BlockchainDataPipeline.Metrics import instrumented, record_outbound, register_gauge, start_metrics_server
+from BlockchainDataPipeline.ResultCache import TTLCache, MISSING
+from BlockchainDataPipeline.WireFormat import TokenAlert, Liquidity, Taxes, Holder, Airdrops, encode
 
 
 load_dotenv(find_dotenv())
 
+fastapi_session = requests.Session()
+
+# Body encoding for the loader: "json", or "msgpack" (needs the msgpack package)
+WIRE_FORMAT = os.getenv("WIRE_FORMAT", "json")
+
+# Each returns the HTTP status code, or None when the loader could not be reached
+@instrumented(is_error=lambda status: status != 200)
 def send_to_fastapi(data):
     try:
-        response = requests.post(os.getenv('API_URL'), json=data)
+        body, headers = encode(data, WIRE_FORMAT)
+        start = time.perf_counter()
+        response = fastapi_session.post(os.getenv('API_URL'), data=body, headers=headers, timeout=15)
+        record_outbound("loader", os.getenv('API_URL'), "send", time.perf_counter() - start, response.status_code != 200)
         if response.status_code == 200:
             logging.info("Data sent to FastAPI successfully.")
             logging.info(f"FastAPI response: {response.json()}")
         else:
             logging.error(f"Failed to send data: {response.status_code} - {response.text}")
+        return response.status_code
     except Exception as e:
         logging.exception(f"Error sending data to FastAPI: {e}")
+        return None
+
+
+@instrumented(is_error=lambda status: status != 200)
+def send_batch_to_fastapi(items):
+    url = os.getenv('API_BATCH_URL') or f"{os.getenv('API_URL')}/batch"
+    try:
+        body, headers = encode(items, WIRE_FORMAT)
+        start = time.perf_counter()
+        response = fastapi_session.post(url, data=body, headers=headers, timeout=30)
+        record_outbound("loader", url, "send_batch", time.perf_counter() - start, response.status_code != 200)
+        if response.status_code == 200:
+            logging.info(f"Batch of {len(items)} sent to FastAPI successfully.")
+        else:
+            logging.error(f"Failed to send batch: {response.status_code} - {response.text}")
+        return response.status_code
+    except Exception as e:
+        logging.exception(f"Error sending batch to FastAPI: {e}")
+        return None
+
+
+# Reserve updates are only worth sending while fresh, so they skip the outbox
+@instrumented(is_error=lambda status: status != 200)
+def send_update_to_fastapi(update):
+    url = os.getenv('API_UPDATE_URL') or f"{os.getenv('API_URL').rsplit('/', 1)[0]}/send_update"
+    try:
+        body, headers = encode(update.to_row(), WIRE_FORMAT)
+        start = time.perf_counter()
+        response = fastapi_session.post(url, data=body, headers=headers, timeout=15)
+        record_outbound("loader", url, "send_update", time.perf_counter() - start, response.status_code != 200)
+        if response.status_code == 200:
+            logging.info(f"Reserve update for {update.contract_address} sent to FastAPI.")
+        else:
+            logging.error(f"Failed to send reserve update: {response.status_code} - {response.text}")
+        return response.status_code
+    except Exception as e:
+        logging.exception(f"Error sending reserve update to FastAPI: {e}")
+        return None
+
+
+# Enriched results wait on disk until the loader has accepted them
+outbox = DurableQueue(
+    os.getenv("OUTBOX_PATH", "outbox.db"),
+    max_items=int(os.getenv("OUTBOX_MAX_ITEMS", "10000")),
+)
+# How long a put waits for room before logging that the outbox is still full
+OUTBOX_PUT_TIMEOUT = float(os.getenv("OUTBOX_PUT_TIMEOUT", "30"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+
+
+# An enriched result is never dropped: while the outbox is full the caller waits, and
+# the backlog builds up in the enrichment queue, which drops messages by age instead
+def publish_row(row):
+    while True:
+        try:
+            outbox.put(row, timeout=OUTBOX_PUT_TIMEOUT)
+            return
+        except QueueFull as e:
+            logger.warning(f"Outbox full for {OUTBOX_PUT_TIMEOUT:.0f}s ({e}), still waiting for the loader")
+
+
+# Drain the outbox into FastAPI in batches, acknowledging whatever was delivered
+def forward_results(stop_event, retry_delay=5):
+    while not stop_event.is_set():
+        batch = outbox.get_batch(OUTBOX_BATCH_SIZE, timeout=1)
+        if not batch:
+            continue
+        ids = [item_id for item_id, _ in batch]
+        status = send_batch_to_fastapi([data for _, data in batch])
+        if status == 200:
+            outbox.ack(ids)
+            continue
+        if status is not None and 400 <= status < 500:
+            # One bad item fails the whole batch: send one by one and drop only the rejects
+            delivered, failed = [], []
+            for item_id, data in batch:
+                item_status = send_to_fastapi(data)
+                if item_status is None or item_status >= 500:
+                    failed.append(item_id)
+                else:
+                    if item_status != 200:
+                        logging.error(f"Loader rejected result {item_id}, dropping it: {data}")
+                    delivered.append(item_id)
+            outbox.ack(delivered)
+            outbox.nack(failed)
+            if not failed:
+                continue
+        else:
+            outbox.nack(ids)
+        logging.warning(f"Results kept in the outbox, retrying in {retry_delay}s")
+        stop_event.wait(retry_delay)
 
 
 # Logging setup
@@ -42,6 +148,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("TelegramBot")
 
+# Channel the new pair alerts are read from
+SOURCE_CHANNEL = "DEXTNewPairsBotBSC"
+
 # Telegram API details
 app = Client("session", api_id=os.getenv('API_ID_ON_MESSAGE'), api_hash=os.getenv('API_HASH_ON_MESSAGE'))
 
@@ -63,7 +172,194 @@ def extract_data(message):
 
     return data
 
-@app.on_message(filters.chat("DEXTNewPairsBotBSC"))
+# Top holders listed in an alert, all 10 fetch_top_holders returns by default
+TOP_HOLDERS_SENT = int(os.getenv("TOP_HOLDERS_SENT", "10"))
+
+
+# Enrich one extracted message into the alert the loader renders, None without on-chain data
+def enrich_message(extracted_data):
+    contract_address = extracted_data['contract_address']
+
+    # Independent steps run concurrently, slow steps are dropped on timeout
+    enrichment = enrich_token(contract_address)
+    if enrichment.timed_out or enrichment.failed:
+        logger.warning(f"Partial enrichment, timed out: {enrichment.timed_out}, failed: {enrichment.failed}")
+
+    # Token data, liquidity, burned tokens and taxes come from one batched read
+    onchain_data = enrichment.get("onchain")
+    if onchain_data:
+        logger.info("On-chain data fetched successfully.")
+
+        token_data = onchain_data["token_data"]
+        logger.info(f"Token Data: {token_data}")
+
+        liquidity_data = onchain_data["liquidity_data"]
+        if liquidity_data:
+            logger.info(f"Liquidity and Market Cap: {liquidity_data}")
+
+        burned_tokens = onchain_data["burned_tokens"]
+        logger.info(f"Burned Tokens: {burned_tokens}")
+
+        tax_info = onchain_data["tax_info"]
+        logger.info(f"Tax Information: {tax_info}")
+
+        holders = enrichment.get("holders")
+        logger.info(f"Holders: {holders}")
+
+        top_holders = enrichment.get("top_holders")
+        logger.info(f"Top Holders: {top_holders}")
+
+        liquidity_percentage = enrichment.get("liquidity_percentage")
+        if liquidity_percentage is not None:
+            logger.info(f"Liquidity Percentage: {liquidity_percentage}%")
+
+        # Airdrop count and amount from the shared tokentx records
+        airdrops = enrichment.get("airdrops") or {}
+        logger.info(f"Airdrops: {airdrops}")
+
+        # Only what the loader renders goes on the wire
+        return TokenAlert(
+            contract_address=contract_address,
+            token_pair=extracted_data.get("token_pair"),
+            initial_liquidity=extracted_data.get("initial_liquidity"),
+            dextools_url=extracted_data.get("dextools_url"),
+            liquidity=Liquidity(**liquidity_data) if liquidity_data else None,
+            holders=holders,
+            burned_tokens=burned_tokens,
+            top_holders=tuple(Holder(holder["address"], holder["balance"]) for holder in (top_holders or [])[:TOP_HOLDERS_SENT]),
+            taxes=Taxes(tax_info["buy_tax"], tax_info["sell_tax"], tax_info["total_tax"]) if tax_info else None,
+            liquidity_percentage=liquidity_percentage,
+            airdrops=Airdrops(**airdrops) if airdrops else Airdrops(),
+        )
+    return None
+
+
+# Set by start_reserve_tracker (RESERVE_TRACKING): announced pairs are followed for threshold updates
+reserve_tracker = None
+
+
+def start_reserve_tracker(stop_event):
+    global reserve_tracker
+    if os.getenv("RESERVE_TRACKING", "").lower() not in ("1", "true", "yes"):
+        return None
+    reserve_tracker = create_tracker(send_update_to_fastapi)
+    threading.Thread(target=reserve_tracker.run, args=(stop_event,), name="reserve-tracker", daemon=True).start()
+    return reserve_tracker
+
+
+# Follow the pair of a published alert, if reserve tracking is on
+def track_alert(alert):
+    if reserve_tracker is not None and alert.liquidity:
+        reserve_tracker.watch(alert.contract_address, alert.liquidity)
+
+
+# With PAIR_DISCOVERY on, the channel and the factory watcher report the same pairs. A token
+# published from one source is not announced again by the other for ANNOUNCE_DEDUPE_TTL seconds,
+# and a channel message for a token the watcher has queued fills in that entry instead.
+PAIR_DISCOVERY = os.getenv("PAIR_DISCOVERY", "").lower() in ("1", "true", "yes")
+ANNOUNCE_DEDUPE_TTL = float(os.getenv("ANNOUNCE_DEDUPE_TTL", "3600"))
+CHANNEL_SOURCE = "channel"
+DISCOVERY_SOURCE = "discovery"
+published_by = TTLCache(max_entries=100000)  # contract address -> source of the alert published
+pending_discoveries = {}  # contract address -> watcher entry queued and not yet published
+announcement_lock = threading.Lock()
+
+
+def already_announced(extracted_data):
+    source = extracted_data.get('source')
+    if source is None:
+        return False
+    publisher = published_by.get(extracted_data['contract_address'].lower())
+    if publisher is MISSING or publisher == source:
+        return False
+    logger.info(f"Token {extracted_data['contract_address']} was already announced from the {publisher}, skipping it")
+    return True
+
+
+# Called once per queued entry, when it was published or given up on (dropped, failed)
+def settle_announcement(extracted_data, published):
+    if extracted_data.get('source') is None:
+        return
+    key = extracted_data['contract_address'].lower()
+    with announcement_lock:
+        if pending_discoveries.get(key) is extracted_data:
+            del pending_discoveries[key]
+        if published:
+            published_by.set(key, extracted_data['source'], ANNOUNCE_DEDUPE_TTL)
+
+
+# Enrich one extracted message and hand the result to the outbox
+def enrich_and_publish(extracted_data):
+    published = False
+    try:
+        alert = enrich_message(extracted_data)
+        if alert is None:
+            return
+        # Hand off to the outbox, the forwarder delivers it to FastAPI
+        publish_row(alert.to_row())
+        published = True
+    finally:
+        settle_announcement(extracted_data, published)
+    track_alert(alert)
+
+
+# Parsing is cheap, enrichment happens on the worker pool
+enrichment_queue = FreshnessQueue(
+    max_items=int(os.getenv("ENRICHMENT_QUEUE_SIZE", "200")),
+    max_age=float(os.getenv("MAX_MESSAGE_AGE", "120")),
+    on_drop=lambda extracted_data: settle_announcement(extracted_data, published=False),
+)
+enrichment_workers = EnrichmentWorkerPool(
+    enrichment_queue,
+    enrich_and_publish,
+    workers=int(os.getenv("ENRICHMENT_WORKERS", "4")),
+)
+
+# Set in sharded mode (ENRICHMENT_BROKER): messages go to the worker owning the contract
+shard_router = None
+
+
+def enqueue_token(extracted_data, message_time=None, source=CHANNEL_SOURCE):
+    if PAIR_DISCOVERY:
+        extracted_data = dict(extracted_data, source=source)
+    if shard_router is not None:
+        # Both sources route a contract to the same shard, which skips the duplicates
+        return shard_router.route(extracted_data, message_time)
+    if PAIR_DISCOVERY:
+        key = extracted_data['contract_address'].lower()
+        with announcement_lock:
+            if already_announced(extracted_data):
+                return False
+            pending = pending_discoveries.get(key)
+            if pending is not None and source == CHANNEL_SOURCE:
+                # The channel message has the pair and initial liquidity the factory log lacks
+                pending.update(extracted_data)
+                logger.info(f"Token {extracted_data['contract_address']} is already queued, updated it from the channel")
+                return True
+            if source == DISCOVERY_SOURCE:
+                pending_discoveries[key] = extracted_data
+    return enrichment_queue.put(extracted_data, message_time=message_time)
+
+
+# PairCreated logs from the factory, in the same shape extract_data produces
+def announce_pair(pair):
+    logger.info(f"New pair {pair['pair_address']} for {pair['token_address']} at block {pair['block_number']}")
+    extracted_data = {
+        'token_pair': None,
+        'initial_liquidity': None,
+        'contract_address': pair['token_address'],
+        'dextools_url': f"https://www.dextools.io/app/en/bnb/pair-explorer/{pair['pair_address']}",
+    }
+    enqueue_token(extracted_data, message_time=pair['block_time'], source=DISCOVERY_SOURCE)
+
+
+register_gauge("enrichment_queue_depth", "Messages waiting for an enrichment worker.", lambda: len(enrichment_queue))
+register_gauge("enrichment_messages_dropped_stale", "Messages dropped for being too old.", lambda: enrichment_queue.dropped_stale)
+register_gauge("enrichment_messages_dropped_overflow", "Messages dropped because the queue was full.", lambda: enrichment_queue.dropped_overflow)
+register_gauge("outbox_depth", "Enriched results not yet accepted by the loader.", outbox.size)
+
+
+@app.on_message(filters.chat(SOURCE_CHANNEL))
 def parse_message(client, message):
     logger.info("New message received from Telegram channel.")
     try:
@@ -78,82 +374,181 @@ def parse_message(client, message):
 
         if contract_address:
             logger.info(f"Contract Address: {contract_address}")
-
-            # Load token contract
-            token_contract = load_token_contract(contract_address)
-            if token_contract:
-                logger.info("Token contract loaded successfully.")
-
-                # Fetch token data
-                token_data = fetch_token_data(token_contract)
-                if token_data:
-                    logger.info(f"Token Data: {token_data}")
-
-                # Fetch liquidity + market cap
-                liquidity_data = None
-                if token_data:
-                    liquidity_data = fetch_liquidity_and_market_cap(contract_address, token_data)
-                    if liquidity_data:
-                        logger.info(f"Liquidity and Market Cap: {liquidity_data}")
-
-                # Fetch holders
-                holders = fetch_holders(contract_address)
-                logger.info(f"Holders: {holders}")
-
-                # Burned tokens
-                burned_tokens = fetch_burned_tokens(contract_address)
-                logger.info(f"Burned Tokens: {burned_tokens}")
-
-                # Top holders
-                top_holders = fetch_top_holders(contract_address)
-                logger.info(f"Top Holders: {top_holders}")
-
-                # Tax info
-                tax_info = fetch_tax_info(contract_address)
-                logger.info(f"Tax Information: {tax_info}")
-
-                # Liquidity percentage
-                liquidity_percentage = None
-                if liquidity_data and "liquidity_base" in liquidity_data and "total_supply" in token_data:
-                    liquidity_percentage = fetch_liquidity_percentage(
-                        liquidity_data, 
-                        token_data['total_supply']
-                    )
-                    logger.info(f"Liquidity Percentage: {liquidity_percentage}%")
-
-                # Classify airdrops (requires transaction data — pseudo example)
-                transactions = []  # If you have a method to fetch actual tx data, replace here
-                airdrops = classify_airdrops(transactions)
-                logger.info(f"Airdrops: {airdrops}")
-
-                # ---------------------------
-                # Combine data for FastAPI
-                # ---------------------------
-                # Keep dictionaries/lists as is so FastAPI can parse them properly
-                result_data = {
-                    "token_pair": extracted_data.get("token_pair"),  # already str or None
-                    "initial_liquidity": extracted_data.get("initial_liquidity"),  # str or None
-                    "contract_address": contract_address,  # str
-                    "dextools_url": extracted_data.get("dextools_url"),  # str
-                    "token_data": token_data if token_data else {},  # dict
-                    "liquidity_data": liquidity_data if liquidity_data else {},  # dict
-                    "holders": holders,  # int
-                    "burned_tokens": burned_tokens,  # float
-                    "top_holders": top_holders,  # list
-                    "tax_info": tax_info if tax_info else {},  # dict
-                    "liquidity_percentage": liquidity_percentage,  # float
-                    "airdrops": airdrops,  # list
-                }
-
-                # Send data to FastAPI
-                send_to_fastapi(result_data)
+            message_time = message.date.timestamp() if message.date else None
+            enqueue_token(extracted_data, message_time=message_time)
 
     except Exception as e:
         logger.error(f"Error while processing message: {e}", exc_info=True)
 
-if __name__ == "__main__":
+# Backfill: history is read newest first and processed in chunks. After each chunk
+# the id of its oldest message is saved, so an interrupted replay resumes below it.
+# The contracts already sent are appended to a .seen file next to the checkpoint,
+# so a resumed replay does not send them again.
+REPLAY_CHECKPOINT_PATH = os.getenv("REPLAY_CHECKPOINT_PATH", "replay_checkpoint.json")
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", "16"))
+REPLAY_CHUNK_SIZE = int(os.getenv("REPLAY_CHUNK_SIZE", "100"))
+
+
+def _load_replay_checkpoint(path, since, until):
+    """(message id to resume below, until, contracts seen) of a checkpoint for this range, or (0, until, empty set)."""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return 0, until, set()
+    # A checkpoint only applies to the same range; without an end time the saved one is reused
+    if checkpoint.get("since") != since.timestamp():
+        return 0, until, set()
+    if until is not None and checkpoint.get("until") != until.timestamp():
+        return 0, until, set()
+    try:
+        with open(f"{path}.seen") as f:
+            seen_contracts = {line.strip() for line in f if line.strip()}
+    except OSError:
+        seen_contracts = set()
+    return checkpoint.get("message_id", 0), datetime.fromtimestamp(checkpoint["until"]), seen_contracts
+
+
+def _save_replay_checkpoint(path, since, until, message_id, new_contracts=()):
+    # Written before the checkpoint that covers them, a crash in between only repeats the chunk
+    if new_contracts:
+        with open(f"{path}.seen", "a") as f:
+            f.write("".join(f"{contract}\n" for contract in new_contracts))
+            f.flush()
+            os.fsync(f.fileno())
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"since": since.timestamp(), "until": until.timestamp(), "message_id": message_id}, f)
+    os.replace(temp_path, path)
+
+
+def _clear_replay_seen(path):
+    try:
+        os.remove(f"{path}.seen")
+    except FileNotFoundError:
+        pass
+
+
+# Channel messages between since and until, newest first, in lists of chunk_size
+def _history_chunks(client, since, until, offset_id, chunk_size):
+    chunk = []
+    for message in client.get_chat_history(SOURCE_CHANNEL, offset_id=offset_id, offset_date=until):
+        if message.date and message.date.timestamp() < since.timestamp():
+            break
+        chunk.append(message)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_results(alerts, output_path):
+    rows = [alert.to_row() for alert in alerts]
+    if output_path:
+        with open(output_path, "a") as f:
+            f.write("".join(json.dumps(row) + "\n" for row in rows))
+        return
+    for row in rows:
+        publish_row(row)
+
+
+def replay_history(since, until=None, output_path=None, workers=REPLAY_WORKERS, chunk_size=REPLAY_CHUNK_SIZE,
+                   checkpoint_path=REPLAY_CHECKPOINT_PATH):
+    """
+    Enrich every alert the channel posted between since and until.
+
+    Results are appended to output_path as JSON lines, or go through the outbox
+    to the loader when no path is given. Old messages skip the freshness queue,
+    which would drop them as stale, and are enriched on their own thread pool.
+    """
+    offset_id, until, seen_contracts = _load_replay_checkpoint(checkpoint_path, since, until)
+    until = until or datetime.now()
+    if offset_id:
+        logger.info(f"Resuming replay below message {offset_id}, {len(seen_contracts)} contracts already sent")
+    else:
+        _clear_replay_seen(checkpoint_path)
+
+    messages = enriched = 0
+    start = time.monotonic()
+    with app, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replay") as pool:
+        for chunk in _history_chunks(app, since, until, offset_id, chunk_size):
+            batch = []
+            for extracted_data in (extract_data(message.text or message.caption or "") for message in chunk):
+                contract_address = extracted_data.get('contract_address')
+                if contract_address and contract_address.lower() not in seen_contracts:
+                    seen_contracts.add(contract_address.lower())
+                    batch.append(extracted_data)
+            results = [result for result in pool.map(enrich_message, batch) if result is not None]
+            _write_results(results, output_path)
+            _save_replay_checkpoint(checkpoint_path, since, until, chunk[-1].id,
+                                    [extracted_data['contract_address'].lower() for extracted_data in batch])
+
+            messages += len(chunk)
+            enriched += len(results)
+            logger.info(
+                f"Replayed {messages} messages, {enriched} tokens enriched, "
+                f"{messages / (time.monotonic() - start):.1f} messages/s"
+            )
+    return {"messages": messages, "enriched": enriched, "seconds": time.monotonic() - start}
+
+
+def run_replay(args):
+    stop_forwarding = threading.Event()
+    forwarder = None
+    if not args.replay_output:
+        forwarder = threading.Thread(target=forward_results, args=(stop_forwarding,), name="outbox-forwarder", daemon=True)
+        forwarder.start()
+    try:
+        stats = replay_history(args.replay_since, args.replay_until, args.replay_output, args.replay_workers)
+        logger.info(f"Replay finished: {stats}")
+        # Whatever is still queued stays in the outbox for the next run
+        deadline = time.monotonic() + 60
+        while forwarder and outbox.size() and time.monotonic() < deadline:
+            time.sleep(1)
+    finally:
+        stop_forwarding.set()
+        if forwarder:
+            forwarder.join(timeout=5)
+
+
+def run_live():
+    global shard_router
     logger.info("Starting Pyrogram client...")
+    if os.getenv("METRICS_PORT"):
+        start_metrics_server(int(os.getenv("METRICS_PORT")), os.getenv("METRICS_HOST", "127.0.0.1"))
+    stop_forwarding = threading.Event()
+    forwarder = threading.Thread(target=forward_results, args=(stop_forwarding,), name="outbox-forwarder", daemon=True)
+    if BROKER_ADDRESS:
+        # Only parse and route here, the shard workers enrich and publish
+        shard_router = ShardRouter(parse_address(BROKER_ADDRESS), BROKER_AUTHKEY.encode())
+        logger.info(f"Routing messages to {shard_router.shards} enrichment shards via {BROKER_ADDRESS}")
+    else:
+        forwarder.start()
+        enrichment_workers.start()
+        start_reserve_tracker(stop_forwarding)
+    if PAIR_DISCOVERY:
+        watcher = create_watcher(announce_pair)
+        threading.Thread(target=watcher.run, args=(stop_forwarding,), name="pair-discovery", daemon=True).start()
     try:
         app.run()
     except Exception as e:
         logger.critical(f"Critical error: {e}", exc_info=True)
+    finally:
+        enrichment_workers.stop()
+        stop_forwarding.set()
+        if forwarder.is_alive():
+            forwarder.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relay DEXTools new pair alerts, live or replayed from the channel history")
+    parser.add_argument("--replay-since", type=datetime.fromisoformat, help="replay alerts posted after this time (ISO 8601)")
+    parser.add_argument("--replay-until", type=datetime.fromisoformat, help="and before this time, defaults to now")
+    parser.add_argument("--replay-output", help="JSON lines file for the results, by default they go to the loader")
+    parser.add_argument("--replay-workers", type=int, default=REPLAY_WORKERS)
+    args = parser.parse_args()
+    if args.replay_since:
+        run_replay(args)
+    else:
+        run_live()
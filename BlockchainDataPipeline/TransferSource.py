@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv, find_dotenv
+from BlockchainDataPipeline.ExplorerClient import explorer_client, ExplorerError
+from BlockchainDataPipeline.HolderLedger import HolderLedger
+
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger("TransferSource")
+
+BSC_CHAIN_ID = 56
+
+# The explorer refuses to page past page * offset > 10000 records
+EXPLORER_RESULT_WINDOW = 10000
+
+
+# Records carry no log index, so transfers in the same block are told apart by content
+def _transfer_key(tx):
+    return (tx.get("hash"), tx.get("from"), tx.get("to"), tx.get("value"))
+
+
+class TokenTransferSource:
+    """
+    One shared reader of the explorer's tokentx endpoint.
+
+    stream() pages through transfers oldest first and yields them one by one.
+    sync() remembers, per contract, the last block it has seen and only pulls
+    transfers from that block on. New transfers are folded into the contract's
+    HolderLedger, so holders, top holders and airdrops all read the same
+    state built from a single download.
+    """
+
+    def __init__(self, client, page_size=1000, max_contracts=1000):
+        self.client = client
+        self.page_size = page_size
+        self.max_contracts = max_contracts
+        self._contracts = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _get_page(self, contract_address, start_block, page):
+        params = {
+            "chainid": BSC_CHAIN_ID,
+            "module": "account",
+            "action": "tokentx",
+            "contractaddress": contract_address,
+            "startblock": start_block,
+            "endblock": 99999999,
+            "page": page,
+            "offset": self.page_size,
+            "sort": "asc",
+        }
+        response = self.client.get(params)
+        if response.get("status") == "1" and isinstance(response.get("result"), list):
+            return response["result"]
+        if response.get("message") == "No transactions found":
+            return []
+        raise ExplorerError(response.get("result") or response.get("message", "Unknown error"))
+
+    def stream(self, contract_address, start_block=0, skip_keys=()):
+        """
+        Yield transfers from start_block on. skip_keys holds the keys of records
+        already seen in start_block itself, which is re-read because more
+        transfers may have landed in it since.
+        """
+        skip_keys = set(skip_keys)
+        max_pages = max(1, EXPLORER_RESULT_WINDOW // self.page_size)
+        while True:
+            last_block, last_block_keys = None, set()
+            for page in range(1, max_pages + 1):
+                records = self._get_page(contract_address, start_block, page)
+                for tx in records:
+                    block = int(tx["blockNumber"])
+                    key = _transfer_key(tx)
+                    if block == start_block and key in skip_keys:
+                        continue
+                    if block != last_block:
+                        last_block, last_block_keys = block, set()
+                    last_block_keys.add(key)
+                    yield tx
+                if len(records) < self.page_size:
+                    return
+            if last_block is None or last_block == start_block:
+                logger.warning(f"More than {EXPLORER_RESULT_WINDOW} transfers in block {start_block} of {contract_address}, stopping")
+                return
+            # Result window exhausted: carry on from the last block reached,
+            # skipping what was already yielded from it
+            start_block, skip_keys = last_block, last_block_keys
+
+    def _contract_lock(self, contract_address):
+        with self._lock:
+            return self._locks.setdefault(contract_address, threading.Lock())
+
+    def _state(self, contract_address):
+        with self._lock:
+            state = self._contracts.get(contract_address)
+            if state is None:
+                state = {"next_block": 0, "boundary_keys": set(), "ledger": HolderLedger()}
+                self._contracts[contract_address] = state
+            self._contracts.move_to_end(contract_address)
+            self._evict()
+            return state
+
+    def _sync(self, contract_address, state):
+        next_block, boundary_keys = state["next_block"], set(state["boundary_keys"])
+        new_records = []
+        for tx in self.stream(contract_address, next_block, boundary_keys):
+            block = int(tx["blockNumber"])
+            if block != next_block:
+                next_block, boundary_keys = block, set()
+            boundary_keys.add(_transfer_key(tx))
+            new_records.append(tx)
+
+        # Only move the cursor once every page came back
+        state["next_block"], state["boundary_keys"] = next_block, boundary_keys
+        state["ledger"].apply(new_records)
+        if new_records:
+            logger.info(f"Pulled {len(new_records)} new transfers for {contract_address}")
+        return new_records
+
+    def sync(self, contract_address):
+        """Pull transfers newer than the last sync into the store, return only the new ones."""
+        contract_address = contract_address.lower()
+        with self._contract_lock(contract_address):
+            return self._sync(contract_address, self._state(contract_address))
+
+    def ledger(self, contract_address):
+        """The contract's HolderLedger, synced up to now."""
+        contract_address = contract_address.lower()
+        with self._contract_lock(contract_address):
+            state = self._state(contract_address)
+            self._sync(contract_address, state)
+            return state["ledger"]
+
+    def _evict(self):
+        while len(self._contracts) > self.max_contracts:
+            evicted, _ = self._contracts.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+
+transfer_source = TokenTransferSource(
+    explorer_client,
+    page_size=int(os.getenv("TOKENTX_PAGE_SIZE", "1000")),
+    max_contracts=int(os.getenv("TOKENTX_MAX_CONTRACTS", "1000")),
+)
@@ -0,0 +1,253 @@
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # JSON only
+    msgpack = None
+
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+# Upper bound for a decompressed body, so a small deflate bomb cannot eat the loader's memory
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class WireFormatError(ValueError):
+    pass
+
+
+def _optional(convert, value):
+    return None if value is None else convert(value)
+
+
+@dataclass(frozen=True, slots=True)
+class Liquidity:
+    base_token: str
+    liquidity_base: float
+    liquidity_token: float
+    market_cap_base: Optional[float] = None
+    liquidity_usd: Optional[float] = None
+    market_cap_usd: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Taxes:
+    buy: float
+    sell: float
+    total: float
+
+
+@dataclass(frozen=True, slots=True)
+class Holder:
+    address: str
+    balance: float
+
+
+@dataclass(frozen=True, slots=True)
+class Airdrops:
+    count: int = 0
+    total_amount: float = 0.0
+    recipients: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class TokenAlert:
+    """
+    Everything the loader renders for one token, and nothing else.
+
+    On the wire an alert is a flat positional row (see to_row), which keeps
+    field names out of every message.
+    """
+    contract_address: str
+    token_pair: Optional[str] = None
+    initial_liquidity: Optional[str] = None
+    dextools_url: Optional[str] = None
+    liquidity: Optional[Liquidity] = None
+    holders: Optional[int] = None
+    burned_tokens: Optional[float] = None
+    top_holders: Tuple[Holder, ...] = ()
+    taxes: Optional[Taxes] = None
+    liquidity_percentage: Optional[float] = None
+    airdrops: Airdrops = Airdrops()
+
+    def to_row(self):
+        liquidity = self.liquidity
+        return [
+            self.contract_address,
+            self.token_pair,
+            self.initial_liquidity,
+            self.dextools_url,
+            None if liquidity is None else [
+                liquidity.base_token, liquidity.liquidity_base, liquidity.liquidity_token, liquidity.market_cap_base,
+                liquidity.liquidity_usd, liquidity.market_cap_usd,
+            ],
+            self.holders,
+            self.burned_tokens,
+            [[holder.address, holder.balance] for holder in self.top_holders],
+            None if self.taxes is None else [self.taxes.buy, self.taxes.sell, self.taxes.total],
+            self.liquidity_percentage,
+            [self.airdrops.count, self.airdrops.total_amount, self.airdrops.recipients],
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        try:
+            (contract_address, token_pair, initial_liquidity, dextools_url, liquidity, holders, burned_tokens,
+             top_holders, taxes, liquidity_percentage, airdrops) = row
+            return cls(
+                contract_address=str(contract_address),
+                token_pair=_optional(str, token_pair),
+                initial_liquidity=_optional(str, initial_liquidity),
+                dextools_url=_optional(str, dextools_url),
+                liquidity=None if liquidity is None else _liquidity_from_row(liquidity),
+                holders=_optional(int, holders),
+                burned_tokens=_optional(float, burned_tokens),
+                top_holders=tuple(Holder(str(address), float(balance)) for address, balance in top_holders),
+                taxes=None if taxes is None else Taxes(float(taxes[0]), float(taxes[1]), float(taxes[2])),
+                liquidity_percentage=_optional(float, liquidity_percentage),
+                airdrops=Airdrops(int(airdrops[0]), float(airdrops[1]), int(airdrops[2])),
+            )
+        except (TypeError, ValueError, IndexError, KeyError, AttributeError) as e:
+            raise WireFormatError(f"Invalid token alert row: {e}") from e
+
+    @classmethod
+    def from_legacy(cls, data):
+        """Alert from the old loose TokenData dict, for results queued before the upgrade."""
+        try:
+            liquidity_data = data.get("liquidity_data") or {}
+            tax_info = data.get("tax_info") or {}
+            airdrops = data.get("airdrops") or []
+            return cls(
+                contract_address=str(data.get("contract_address") or ""),
+                token_pair=data.get("token_pair"),
+                initial_liquidity=data.get("initial_liquidity"),
+                dextools_url=data.get("dextools_url"),
+                liquidity=Liquidity(
+                    str(liquidity_data.get("base_token")),
+                    float(liquidity_data.get("liquidity_base", 0)),
+                    float(liquidity_data.get("liquidity_token", 0)),
+                    _optional(float, liquidity_data.get("market_cap_base")),
+                    _optional(float, liquidity_data.get("liquidity_usd")),
+                    _optional(float, liquidity_data.get("market_cap_usd")),
+                ) if "liquidity_base" in liquidity_data else None,
+                holders=_optional(int, data.get("holders")),
+                burned_tokens=_optional(float, data.get("burned_tokens")),
+                top_holders=tuple(
+                    Holder(str(holder["address"]), float(holder["balance"]))
+                    for holder in data.get("top_holders") or [] if isinstance(holder, dict)
+                ),
+                taxes=Taxes(
+                    float(tax_info.get("buy_tax", 0)), float(tax_info.get("sell_tax", 0)), float(tax_info.get("total_tax", 0)),
+                ) if tax_info else None,
+                liquidity_percentage=_optional(float, data.get("liquidity_percentage")),
+                airdrops=_legacy_airdrops(airdrops),
+            )
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            raise WireFormatError(f"Invalid token data: {e}") from e
+
+
+@dataclass(frozen=True, slots=True)
+class ReserveUpdate:
+    """
+    Follow-up for an announced pair whose reserves crossed a threshold.
+    change is the liquidity left as a fraction of the announced liquidity
+    for kind "liquidity_pulled", and the market cap multiple for kind
+    "market_cap_multiple".
+    """
+    contract_address: str
+    pair_address: str
+    kind: str
+    base_token: str
+    liquidity_base: float
+    market_cap_base: float
+    change: float
+    market_cap_usd: Optional[float] = None
+
+    def to_row(self):
+        return [
+            self.contract_address, self.pair_address, self.kind, self.base_token,
+            self.liquidity_base, self.market_cap_base, self.change, self.market_cap_usd,
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        try:
+            (contract_address, pair_address, kind, base_token, liquidity_base, market_cap_base, change,
+             market_cap_usd) = row
+            return cls(
+                str(contract_address), str(pair_address), str(kind), str(base_token),
+                float(liquidity_base), float(market_cap_base), float(change), _optional(float, market_cap_usd),
+            )
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            raise WireFormatError(f"Invalid reserve update row: {e}") from e
+
+
+# Rows written before the USD fields existed have four liquidity entries
+def _liquidity_from_row(liquidity):
+    liquidity_usd, market_cap_usd = (list(liquidity[4:6]) + [None, None])[:2]
+    return Liquidity(
+        str(liquidity[0]), float(liquidity[1]), float(liquidity[2]), _optional(float, liquidity[3]),
+        _optional(float, liquidity_usd), _optional(float, market_cap_usd),
+    )
+
+
+# Summary of the raw tokentx records the old format carried
+def _legacy_airdrops(transactions):
+    records = [tx for tx in transactions if isinstance(tx, dict) and "value" in tx]
+    total = sum(int(tx["value"]) / 10 ** int(tx.get("tokenDecimal", 0)) for tx in records)
+    return Airdrops(len(transactions), total, len({str(tx.get("to", "")).lower() for tx in records}))
+
+
+def alert_from_item(item):
+    """A compact row or a legacy dict, as found in a request body or the outbox."""
+    if isinstance(item, dict):
+        return TokenAlert.from_legacy(item)
+    if isinstance(item, (list, tuple)):
+        return TokenAlert.from_row(item)
+    raise WireFormatError(f"Unexpected token alert of type {type(item).__name__}")
+
+
+def encode(payload, encoding="json"):
+    """Body bytes and HTTP headers for a JSON-compatible payload."""
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise WireFormatError("msgpack is not installed")
+        body = msgpack.packb(payload, use_bin_type=True)
+        headers = {"Content-Type": MSGPACK_CONTENT_TYPE}
+    else:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {"Content-Type": JSON_CONTENT_TYPE}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body = zlib.compress(body, 1)
+        headers["Content-Encoding"] = "deflate"
+    return body, headers
+
+
+def decode(body, content_type=None, content_encoding=None):
+    if content_encoding == "deflate":
+        decompressor = zlib.decompressobj()
+        try:
+            body = decompressor.decompress(body, MAX_BODY_BYTES)
+        except zlib.error as e:
+            raise WireFormatError(f"Invalid deflate body: {e}") from e
+        if decompressor.unconsumed_tail:
+            raise WireFormatError(f"Body is larger than {MAX_BODY_BYTES} bytes once decompressed")
+    elif content_encoding not in (None, "", "identity"):
+        raise WireFormatError(f"Unsupported content encoding {content_encoding}")
+
+    try:
+        if (content_type or "").split(";")[0].strip() == MSGPACK_CONTENT_TYPE:
+            if msgpack is None:
+                raise WireFormatError("msgpack is not installed")
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+    except WireFormatError:
+        raise
+    except Exception as e:
+        raise WireFormatError(f"Undecodable body: {e}") from e
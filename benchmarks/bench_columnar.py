@@ -0,0 +1,99 @@
+import random
+import sys
+import time
+from BlockchainDataPipeline.BlockchainDataHandler import classify_airdrops
+from BlockchainDataPipeline.ColumnarTransfers import aggregate_transfers
+from BlockchainDataPipeline.HolderLedger import HolderLedger, EXCLUDED_ADDRESSES
+import BlockchainDataPipeline.HolderLedger as holder_ledger
+
+
+# Synthetic tokentx records: a few whales, many small holders and some dust airdrops
+def generate_transfers(count, holders=None, seed=1):
+    rng = random.Random(seed)
+    holders = holders or max(100, count // 10)
+    addresses = [f"0x{index:040x}" for index in range(1, holders + 1)]
+    transfers = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.2:
+            value = rng.randrange(1, 10**18)  # dust, counts as an airdrop
+        elif kind < 0.95:
+            value = rng.randrange(10**18, 10**24)
+        else:
+            value = rng.randrange(10**24, 10**30)
+        transfers.append({
+            "from": rng.choice(addresses),
+            "to": rng.choice(addresses),
+            "value": str(value),
+            "tokenDecimal": "18",
+            "blockNumber": "1",
+        })
+    return transfers
+
+
+# The per-row loop fetch_top_holders and classify_airdrops used before the ledger
+def row_by_row(transfers):
+    holder_balances = {}
+    airdrops = []
+    for tx in transfers:
+        value = int(tx["value"])
+        holder_balances[tx["to"]] = holder_balances.get(tx["to"], 0) + value
+        holder_balances[tx["from"]] = holder_balances.get(tx["from"], 0) - value
+        if value < 1 * 10**int(tx["tokenDecimal"]) and int(tx.get("txreceipt_status", 1)) == 1:
+            airdrops.append(tx)
+    sorted_holders = sorted(holder_balances.items(), key=lambda x: x[1], reverse=True)
+    return sorted_holders, airdrops
+
+
+# The row loop's results with the ledger's rules applied: zero and dead addresses are not
+# holders, only positive balances count, and ties are ranked by address
+def comparable(row_result):
+    sorted_holders, airdrops = row_result
+    holders = sorted(
+        ((balance, address) for address, balance in sorted_holders if address not in EXCLUDED_ADDRESSES and balance > 0),
+        key=lambda holder: (-holder[0], holder[1]),
+    )
+    top = [{"address": address, "balance": balance / 10**18} for balance, address in holders[:10]]
+    return top, len(holders), len(airdrops)
+
+
+def ledger(transfers, columnar):
+    holder_ledger.COLUMNAR_MIN_ROWS = 1 if columnar else len(transfers) + 1
+    result = HolderLedger()
+    result.apply(transfers)
+    return result.top_holders(10), result.holder_count, result.airdrop_count
+
+
+# Best of a few runs, single runs of the 1M case swing by a third on a busy machine
+def timed(func, *args, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(sizes):
+    print(f"{'transfers':>10} {'row loop':>10} {'ledger':>10} {'ledger+np':>10} {'columnar':>10} {'ledger+np':>10} {'columnar':>9}")
+    print(f"{'':>54} {'vs loop':>10} {'vs loop':>9}")
+    for size in sizes:
+        transfers = generate_transfers(size)
+        row_time, row_result = timed(row_by_row, transfers)
+        ledger_time, expected = timed(ledger, transfers, False)
+        if comparable(row_result) != expected or len(classify_airdrops(transfers)) != expected[2]:
+            raise SystemExit(f"Ledger result differs from the row loop at {size} transfers")
+        ledger_columnar_time, ledger_columnar = timed(ledger, transfers, True)
+        columnar_time, result = timed(aggregate_transfers, transfers, EXCLUDED_ADDRESSES)
+        actual = (result["top_holders"], result["holder_count"], int(result["airdrop_mask"].sum()))
+        if actual != expected or ledger_columnar != expected:
+            raise SystemExit(f"Columnar result differs from the ledger at {size} transfers")
+        print(
+            f"{size:>10} {row_time:>9.3f}s {ledger_time:>9.3f}s {ledger_columnar_time:>9.3f}s "
+            f"{columnar_time:>9.3f}s {row_time / ledger_columnar_time:>9.1f}x {row_time / columnar_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,157 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from benchmarks.fakes import FakeRpcNode, FakeExplorer, FakeTelegram, token_address
+
+
+# The pipeline modules read their endpoints and limits at import time,
+# so the fakes are started and the environment set before importing them.
+def configure(args, rpc_url, explorer_url, telegram_url, loader_url, workdir):
+    os.environ.update({
+        "BSC_RPC_URLS": rpc_url,
+        "EXPLORER_API_URL": explorer_url,
+        "TELEGRAM_API_URL": telegram_url,
+        "API_URL": f"{loader_url}/send_to_telegram",
+        "API_BATCH_URL": f"{loader_url}/send_to_telegram/batch",
+        "BOT_TG_TOKEN": "bench",
+        "CHAT_BOT_ID": "-100",
+        "TOKEN_CACHE_PATH": os.path.join(workdir, "token_cache.db"),
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "EXPLORER_RATE_LIMIT": str(args.explorer_rate),
+        "TELEGRAM_CHAT_RATE": str(args.telegram_rate),
+        "TELEGRAM_GLOBAL_RATE": str(args.telegram_rate),
+        "TELEGRAM_COALESCE_WINDOW": str(args.coalesce_window),
+        "ENRICHMENT_WORKERS": str(args.workers),
+        "ENRICHMENT_QUEUE_SIZE": str(max(args.messages, 200)),
+        "TELEGRAM_QUEUE_SIZE": str(max(args.messages, 1000)),
+    })
+
+
+def dextools_message(index):
+    address = token_address(index)
+    return SimpleNamespace(
+        text=(
+            f"🆕 New pair (BT{index}/WBNB)\n"
+            f"Initial Liquidity: $12,{index % 1000:03d}\n"
+            f"Token contract: {address}\n"
+            f"DEXTools: https://www.dextools.io/app/en/bnb/pair-explorer/{address}"
+        ),
+        date=datetime.now(),
+    )
+
+
+def start_loader(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def free_port():
+    import socket
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float("nan")
+
+
+def run(args):
+    rpc = FakeRpcNode(latency=args.rpc_latency)
+    explorer = FakeExplorer(transfers_per_token=args.transfers, latency=args.explorer_latency)
+    telegram = FakeTelegram(latency=args.telegram_latency)
+    loader_port = free_port()
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    configure(args, rpc.start(), explorer.start(), telegram.start(), f"http://127.0.0.1:{loader_port}", workdir)
+
+    # The extractor writes its log file and Pyrogram session next to the working directory
+    os.chdir(workdir)
+    from BlockchainDataPipeline import TelegramExtractor, LoadToTelegram
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ("TelegramBot", "EnrichmentWorkers", "FastAPI_Telegram"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    loader_requests = []
+
+    @LoadToTelegram.app.middleware("http")
+    async def count_requests(request, call_next):
+        loader_requests.append(request.url.path)
+        return await call_next(request)
+
+    server, server_thread = start_loader(LoadToTelegram.app, loader_port)
+    stop_forwarding = threading.Event()
+    forwarder = threading.Thread(target=TelegramExtractor.forward_results, args=(stop_forwarding,), daemon=True)
+    forwarder.start()
+    TelegramExtractor.enrichment_workers.start()
+
+    sent_at = {}
+    start = time.monotonic()
+    for index in range(args.messages):
+        sent_at[index] = time.monotonic()
+        TelegramExtractor.parse_message(None, dextools_message(index))
+        if args.rate:
+            time.sleep(max(0.0, start + (index + 1) / args.rate - time.monotonic()))
+
+    deadline = time.monotonic() + args.timeout
+    while len(telegram.delivered()) < args.messages and time.monotonic() < deadline:
+        time.sleep(0.05)
+    arrivals = telegram.delivered()
+
+    TelegramExtractor.enrichment_workers.stop()
+    stop_forwarding.set()
+    forwarder.join(timeout=5)
+    server.should_exit = True
+    server_thread.join(timeout=5)
+    for fake in (rpc, explorer, telegram):
+        fake.stop()
+
+    latencies = [arrivals[index] - sent_at[index] for index in arrivals if index in sent_at]
+    elapsed = (max(arrivals.values()) if arrivals else time.monotonic()) - start
+    delivered = len(latencies)
+    per_message = max(delivered, 1)
+    print(f"messages      {delivered}/{args.messages} delivered in {elapsed:.2f}s")
+    print(f"throughput    {delivered / elapsed:.1f} msg/s")
+    print(f"latency       p50 {percentile(latencies, 0.5) * 1000:.0f} ms, p99 {percentile(latencies, 0.99) * 1000:.0f} ms")
+    print(f"rpc           {rpc.calls['requests'] / per_message:.2f} requests/msg, "
+          f"{rpc.calls['batched_reads'] / per_message:.2f} contract reads/msg")
+    methods = {name: count for name, count in rpc.calls.items() if name.startswith(("eth_", "net_"))}
+    print(f"rpc methods   {', '.join(f'{name} {count / per_message:.2f}' for name, count in sorted(methods.items()))}")
+    print(f"explorer      {explorer.calls['requests'] / per_message:.2f} requests/msg")
+    print(f"loader        {len(loader_requests) / per_message:.2f} requests/msg")
+    print(f"telegram      {telegram.calls['requests'] / per_message:.2f} sendMessage/msg")
+    if delivered < args.messages:
+        raise SystemExit(f"Only {delivered} of {args.messages} messages reached Telegram within {args.timeout}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against local fakes")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=0, help="messages per second to feed, 0 for all at once")
+    parser.add_argument("--workers", type=int, default=4, help="enrichment workers")
+    parser.add_argument("--transfers", type=int, default=500, help="tokentx records per token")
+    parser.add_argument("--rpc-latency", type=float, default=0.05)
+    parser.add_argument("--explorer-latency", type=float, default=0.1)
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument("--explorer-rate", type=float, default=1000, help="explorer calls per second allowed")
+    parser.add_argument("--telegram-rate", type=float, default=1000, help="Telegram messages per second allowed")
+    parser.add_argument("--coalesce-window", type=float, default=0)
+    parser.add_argument("--timeout", type=float, default=120)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,95 @@
+import argparse
+import os
+import queue
+import tempfile
+import time
+from benchmarks.fakes import FakeRpcNode, FakeExplorer, token_address
+from benchmarks.bench_pipeline import free_port
+
+
+# Worker processes start with stdout and stderr on /dev/null, so only the table is printed
+def start_quiet(start, *args, **kwargs):
+    saved = os.dup(1), os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        return start(*args, **kwargs)
+    finally:
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in (devnull,) + saved:
+            os.close(fd)
+
+
+def run_round(args, shards, round_index):
+    from BlockchainDataPipeline.ShardedEnrichment import start_local, ShardRouter
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_sharding_{shards}_")
+    # Spawned workers read their configuration from the environment, with cold caches each round
+    os.environ["TOKEN_CACHE_PATH"] = os.path.join(workdir, "token_cache.db")
+    os.environ["OUTBOX_PATH"] = os.path.join(workdir, "outbox.db")
+    address, authkey = ("127.0.0.1", free_port()), b"bench"
+    processes = start_quiet(start_local, address, authkey, shards, output="broker", threads=args.threads)
+    try:
+        router = ShardRouter(address, authkey)
+        results = router.manager.get_results()
+        # Each round uses fresh tokens so no shard starts with another round's ledgers
+        offset = round_index * args.messages
+        start = time.monotonic()
+        for index in range(offset, offset + args.messages):
+            router.route({"contract_address": token_address(index), "token_pair": None,
+                          "initial_liquidity": None, "dextools_url": None}, time.time())
+        received = 0
+        deadline = start + args.timeout
+        while received < args.messages and time.monotonic() < deadline:
+            try:
+                results.get(timeout=1)
+                received += 1
+            except queue.Empty:
+                continue
+        return received, time.monotonic() - start
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+
+
+def run(args):
+    rpc = FakeRpcNode(latency=args.rpc_latency)
+    explorer = FakeExplorer(transfers_per_token=args.transfers, latency=args.explorer_latency)
+    os.environ.update({
+        "BSC_RPC_URLS": rpc.start(),
+        "EXPLORER_API_URL": explorer.start(),
+        "EXPLORER_RATE_LIMIT": "10000",
+        "MAX_MESSAGE_AGE": "3600",
+    })
+    os.chdir(tempfile.mkdtemp(prefix="bench_sharding_"))
+
+    print(f"{os.cpu_count()} CPUs, {args.threads} threads per worker, {args.transfers} transfers per token")
+    print(f"{'workers':>8} {'messages':>9} {'seconds':>8} {'msg/s':>8} {'scaling':>8}")
+    baseline = None
+    for round_index, shards in enumerate(args.workers):
+        received, elapsed = run_round(args, shards, round_index)
+        throughput = received / elapsed
+        baseline = baseline or throughput / shards
+        print(f"{shards:>8} {received:>9} {elapsed:>8.2f} {throughput:>8.1f} {throughput / baseline / shards:>7.0%}")
+    rpc.stop()
+    explorer.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enrichment throughput by number of shard worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker process")
+    parser.add_argument("--transfers", type=int, default=3000, help="tokentx records per token")
+    parser.add_argument("--rpc-latency", type=float, default=0.02)
+    parser.add_argument("--explorer-latency", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=300)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,91 @@
+import json
+import sys
+import time
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel
+from benchmarks.fakes import generate_token_transfers, token_address
+from BlockchainDataPipeline.HolderLedger import HolderLedger, is_airdrop
+from BlockchainDataPipeline.WireFormat import (
+    TokenAlert, Liquidity, Taxes, Holder, Airdrops, alert_from_item, encode, decode, msgpack,
+)
+
+
+# The loose model the loader validated before the compact format
+class LegacyTokenData(BaseModel):
+    token_pair: Optional[str]
+    initial_liquidity: Optional[str]
+    contract_address: Optional[str]
+    dextools_url: Optional[str]
+    token_data: Optional[Dict[str, Any]] = None
+    liquidity_data: Optional[Dict[str, Any]] = None
+    holders: Optional[int] = None
+    burned_tokens: Optional[float] = None
+    top_holders: Optional[List[Any]] = None
+    tax_info: Optional[Dict[str, Any]] = None
+    liquidity_percentage: Optional[float] = None
+    airdrops: Optional[List[Any]] = None
+
+
+def payloads(transfers_per_token):
+    address = token_address(0)
+    transfers = generate_token_transfers(address, transfers_per_token)
+    ledger = HolderLedger()
+    ledger.apply(transfers)
+    liquidity = {"base_token": "WBNB", "liquidity_base": 50.0, "liquidity_token": 5e8, "market_cap_base": 100.0}
+    common = {
+        "token_pair": "BT0/WBNB",
+        "initial_liquidity": "12345",
+        "contract_address": address,
+        "dextools_url": f"https://www.dextools.io/app/en/bnb/pair-explorer/{address}",
+    }
+    legacy = dict(
+        common,
+        token_data={"name": "Bench Token 0", "symbol": "BT0", "decimals": 18, "total_supply": 1e9},
+        liquidity_data=liquidity,
+        holders=ledger.holder_count,
+        burned_tokens=1.0,
+        top_holders=ledger.top_holders(10),
+        tax_info={"buy_tax": 3, "sell_tax": 5, "total_tax": 8},
+        liquidity_percentage=5.0,
+        airdrops=[tx for tx in transfers if is_airdrop(tx)],
+    )
+    alert = TokenAlert(
+        **common,
+        liquidity=Liquidity(**liquidity),
+        holders=ledger.holder_count,
+        burned_tokens=1.0,
+        top_holders=tuple(Holder(holder["address"], holder["balance"]) for holder in ledger.top_holders(5)),
+        taxes=Taxes(3, 5, 8),
+        liquidity_percentage=5.0,
+        airdrops=Airdrops(**ledger.airdrop_summary()),
+    )
+    return legacy, alert
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(transfer_counts, repeat=200):
+    print(f"{'transfers':>10} {'format':>16} {'bytes':>9} {'decode':>10}")
+    for count in transfer_counts:
+        legacy, alert = payloads(count)
+        legacy_body = json.dumps(legacy).encode()
+        cases = [("legacy json", legacy_body, lambda: LegacyTokenData(**json.loads(legacy_body)))]
+        encodings = ["json", "msgpack"] if msgpack is not None else ["json"]
+        for encoding in encodings:
+            body, headers = encode(alert.to_row(), encoding)
+            decode_alert = (lambda body=body, headers=headers: alert_from_item(
+                decode(body, headers["Content-Type"], headers.get("Content-Encoding"))))
+            if decode_alert() != alert:
+                raise SystemExit(f"{encoding} round trip changed the alert")
+            cases.append((f"compact {encoding}", body, decode_alert))
+        for name, body, decode_body in cases:
+            print(f"{count:>10} {name:>16} {len(body):>9} {timed(decode_body, repeat) * 1e6:>8.1f}us")
+
+
+if __name__ == "__main__":
+    run([int(count) for count in sys.argv[1:]] or [100, 1_000, 10_000])
@@ -0,0 +1,235 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from eth_abi import decode, encode
+
+
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+
+# Selectors of the reads the pipeline batches into aggregate3
+NAME = bytes.fromhex("06fdde03")
+SYMBOL = bytes.fromhex("95d89b41")
+DECIMALS = bytes.fromhex("313ce567")
+TOTAL_SUPPLY = bytes.fromhex("18160ddd")
+BALANCE_OF = bytes.fromhex("70a08231")
+BUY_TAX = bytes.fromhex("4f7041a5")
+SELL_TAX = bytes.fromhex("cc1776d3")
+FEE_DENOMINATOR = bytes.fromhex("180b0d7e")
+GET_RESERVES = bytes.fromhex("0902f1ac")
+
+TOKEN_SUPPLY = 10**27
+
+
+def token_address(index):
+    """Address of synthetic token number `index`, which the fakes can map back."""
+    return "0x" + f"{0xBE5C << 144 | index + 1:040x}"
+
+
+def token_index(address):
+    value = int(address, 16)
+    return (value & ((1 << 144) - 1)) - 1 if value >> 144 == 0xBE5C else None
+
+
+def burned_amount(index):
+    """Burned balance of token `index` in whole tokens; it tags the token's Telegram message."""
+    return index + 1
+
+
+class FakeServer:
+    """Threaded local HTTP server with a fixed per-request latency and call counters."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._respond(self, fake.handle_get)
+
+            def do_POST(self):
+                fake._respond(self, fake.handle_post)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.calls[name] += amount
+
+    def _respond(self, request, handle):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        status, payload = handle(request.path, body)
+        data = json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def handle_get(self, path, body):
+        return 404, {"error": "not found"}
+
+    def handle_post(self, path, body):
+        return 404, {"error": "not found"}
+
+
+class FakeRpcNode(FakeServer):
+    """
+    BSC JSON-RPC stand-in that answers Multicall3 aggregate3 eth_calls.
+
+    Synthetic tokens (see token_address) answer the ERC20 and tax reads, and
+    every other target answers decimals() and getReserves as a funded
+    PancakeSwap pair.
+    """
+
+    def handle_post(self, path, body):
+        request = json.loads(body)
+        if isinstance(request, list):
+            return 200, [self._answer(item) for item in request]
+        return 200, self._answer(request)
+
+    def _answer(self, request):
+        method = request.get("method")
+        self.count("requests")
+        self.count(method)
+        if method == "eth_chainId":
+            result = "0x38"
+        elif method == "eth_blockNumber":
+            result = hex(40_000_000)
+        elif method == "eth_call":
+            result = "0x" + self._eth_call(request["params"][0]).hex()
+        else:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "method not found"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def _eth_call(self, transaction):
+        data = bytes.fromhex((transaction.get("data") or transaction.get("input"))[2:])
+        if data[:4] != AGGREGATE3_SELECTOR:
+            return b""
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        self.count("batched_reads", len(calls))
+        results = [self._read(target, call_data) for target, _, call_data in calls]
+        return encode(["(bool,bytes)[]"], [results])
+
+    def _read(self, target, call_data):
+        selector = call_data[:4]
+        index = token_index(target)
+        if index is None:
+            if selector == GET_RESERVES:
+                return True, encode(["uint112", "uint112", "uint32"], [50 * 10**18, TOKEN_SUPPLY // 2, 0])
+            # Base tokens, read once for the price cache
+            if selector == DECIMALS:
+                return True, encode(["uint8"], [18])
+            return False, b""
+        if selector == NAME:
+            return True, encode(["string"], [f"Bench Token {index}"])
+        if selector == SYMBOL:
+            return True, encode(["string"], [f"BT{index}"])
+        if selector == DECIMALS:
+            return True, encode(["uint8"], [18])
+        if selector == TOTAL_SUPPLY:
+            return True, encode(["uint256"], [TOKEN_SUPPLY])
+        if selector == BALANCE_OF:
+            return True, encode(["uint256"], [burned_amount(index) * 10**18])
+        if selector in (BUY_TAX, SELL_TAX):
+            return True, encode(["uint256"], [3 + index % 5])
+        if selector == FEE_DENOMINATOR:
+            return True, encode(["uint256"], [100])
+        return False, b""
+
+
+def generate_token_transfers(address, count, holders=200):
+    """Deterministic tokentx records for one token, oldest first."""
+    rng = random.Random(address)
+    wallets = [f"0x{rng.getrandbits(160):040x}" for _ in range(holders)]
+    transfers = []
+    for number in range(count):
+        value = rng.randrange(1, 10**18) if rng.random() < 0.1 else rng.randrange(10**18, 10**24)
+        transfers.append({
+            "blockNumber": str(30_000_000 + number // 3),
+            "hash": f"0x{rng.getrandbits(256):064x}",
+            "from": "0x0000000000000000000000000000000000000000" if number < 20 else rng.choice(wallets),
+            "to": rng.choice(wallets),
+            "value": str(value),
+            "tokenDecimal": "18",
+            "contractAddress": address.lower(),
+        })
+    return transfers
+
+
+class FakeExplorer(FakeServer):
+    """Etherscan v2 tokentx stand-in serving synthetic transfers with block paging."""
+
+    def __init__(self, transfers_per_token=500, latency=0.0):
+        super().__init__(latency)
+        self.transfers_per_token = transfers_per_token
+        self._transfers = {}
+
+    def _token_transfers(self, address):
+        address = address.lower()
+        with self._lock:
+            if address not in self._transfers:
+                self._transfers[address] = generate_token_transfers(address, self.transfers_per_token)
+            return self._transfers[address]
+
+    def handle_get(self, path, body):
+        params = {key: values[0] for key, values in parse_qs(urlparse(path).query).items()}
+        self.count("requests")
+        if params.get("action") != "tokentx":
+            return 200, {"status": "0", "message": "NOTOK", "result": "Unsupported action"}
+        start_block = int(params.get("startblock", 0))
+        page, offset = int(params.get("page", 1)), int(params.get("offset", 100))
+        matching = [tx for tx in self._token_transfers(params["contractaddress"]) if int(tx["blockNumber"]) >= start_block]
+        result = matching[(page - 1) * offset:page * offset]
+        if not result:
+            return 200, {"status": "0", "message": "No transactions found", "result": []}
+        return 200, {"status": "1", "message": "OK", "result": result}
+
+
+class FakeTelegram(FakeServer):
+    """Bot API sendMessage stand-in that records when each message arrived."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.messages = []
+
+    def handle_post(self, path, body):
+        self.count("requests")
+        if not path.endswith("/sendMessage"):
+            return 404, {"ok": False, "description": "Not Found"}
+        text = json.loads(body).get("text", "")
+        with self._lock:
+            self.messages.append((time.monotonic(), text))
+        return 200, {"ok": True, "result": {"message_id": len(self.messages)}}
+
+    def delivered(self):
+        """{token index: arrival time}, read from the burned amount in each (possibly coalesced) message."""
+        with self._lock:
+            messages = list(self.messages)
+        arrivals = {}
+        for arrived_at, text in messages:
+            for burned in re.findall(r"Burned Tokens:\*? ([\d.]+)", text):
+                arrivals.setdefault(int(float(burned)) - 1, arrived_at)
+        return arrivals
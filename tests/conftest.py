@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# The pipeline modules read their configuration at import time: keep their
+# state files out of the working tree and point them at nothing by default.
+_state_dir = tempfile.mkdtemp(prefix="pipeline_tests_")
+os.environ.setdefault("TOKEN_CACHE_PATH", os.path.join(_state_dir, "token_cache.db"))
+os.environ.setdefault("OUTBOX_PATH", os.path.join(_state_dir, "outbox.db"))
+os.environ.setdefault("BSC_RPC_URLS", "http://127.0.0.1:9")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# TelegramExtractor logs to telegram_bot.log in the working directory
+os.chdir(_state_dir)
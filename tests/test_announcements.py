@@ -0,0 +1,123 @@
+import time
+import pytest
+from BlockchainDataPipeline import TelegramExtractor
+from BlockchainDataPipeline.EnrichmentWorkers import FreshnessQueue
+from BlockchainDataPipeline.ResultCache import TTLCache
+from BlockchainDataPipeline.WireFormat import TokenAlert
+
+ADDRESS = "0x" + "ab" * 20
+
+
+class ListOutbox:
+    def __init__(self):
+        self.rows = []
+
+    def put(self, row, timeout=None):
+        self.rows.append(row)
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    """TelegramExtractor with pair discovery on, fresh dedupe state and stubbed enrichment."""
+    queue = FreshnessQueue(max_items=10, max_age=60, on_drop=TelegramExtractor.enrichment_queue.on_drop)
+    outbox = ListOutbox()
+    monkeypatch.setattr(TelegramExtractor, "PAIR_DISCOVERY", True)
+    monkeypatch.setattr(TelegramExtractor, "enrichment_queue", queue)
+    monkeypatch.setattr(TelegramExtractor, "outbox", outbox)
+    monkeypatch.setattr(TelegramExtractor, "published_by", TTLCache())
+    monkeypatch.setattr(TelegramExtractor, "pending_discoveries", {})
+    monkeypatch.setattr(TelegramExtractor, "enrich_message", lambda data: TokenAlert(
+        contract_address=data["contract_address"], token_pair=data.get("token_pair")))
+    return queue, outbox
+
+
+def channel_message(token_pair="ABC/WBNB"):
+    return {"contract_address": ADDRESS, "token_pair": token_pair, "initial_liquidity": "10 BNB", "dextools_url": None}
+
+
+def discovery_message():
+    return {"contract_address": ADDRESS, "token_pair": None, "initial_liquidity": None, "dextools_url": None}
+
+
+def process(queue):
+    """Enrich and publish everything queued, as the workers would."""
+    while (next_item := queue.get(timeout=0)) is not None:
+        TelegramExtractor.enrich_and_publish(next_item[0])
+
+
+def test_channel_message_fills_in_a_pending_discovery(extractor):
+    queue, outbox = extractor
+    assert TelegramExtractor.enqueue_token(discovery_message(), source=TelegramExtractor.DISCOVERY_SOURCE)
+    assert TelegramExtractor.enqueue_token(channel_message())
+    assert len(queue) == 1
+
+    process(queue)
+    assert [TokenAlert.from_row(row).token_pair for row in outbox.rows] == ["ABC/WBNB"]
+
+
+def test_published_token_is_skipped_by_the_other_source_only(extractor):
+    queue, outbox = extractor
+    TelegramExtractor.enqueue_token(channel_message())
+    process(queue)
+
+    assert not TelegramExtractor.enqueue_token(discovery_message(), source=TelegramExtractor.DISCOVERY_SOURCE)
+    # The channel announcing it again still makes an alert
+    assert TelegramExtractor.enqueue_token(channel_message("ABC/BUSD"))
+    process(queue)
+    assert len(outbox.rows) == 2
+
+
+def test_dropped_discovery_does_not_suppress_the_channel(extractor):
+    queue, outbox = extractor
+    stale = time.time() - 120
+    assert not TelegramExtractor.enqueue_token(discovery_message(), message_time=stale, source=TelegramExtractor.DISCOVERY_SOURCE)
+
+    assert TelegramExtractor.enqueue_token(channel_message())
+    process(queue)
+    assert len(outbox.rows) == 1
+
+
+def test_failed_enrichment_does_not_suppress_the_other_source(extractor, monkeypatch):
+    queue, outbox = extractor
+    monkeypatch.setattr(TelegramExtractor, "enrich_message", lambda data: None)
+    TelegramExtractor.enqueue_token(discovery_message(), source=TelegramExtractor.DISCOVERY_SOURCE)
+    process(queue)
+
+    assert TelegramExtractor.enqueue_token(channel_message())
+    assert TelegramExtractor.pending_discoveries == {}
+
+
+def test_no_dedupe_without_pair_discovery(extractor, monkeypatch):
+    queue, outbox = extractor
+    monkeypatch.setattr(TelegramExtractor, "PAIR_DISCOVERY", False)
+    TelegramExtractor.enqueue_token(channel_message())
+    process(queue)
+
+    assert TelegramExtractor.enqueue_token(channel_message())
+    process(queue)
+    assert len(outbox.rows) == 2
+
+
+class FullOutbox(ListOutbox):
+    """Full for the first `full_for` puts."""
+
+    def __init__(self, full_for):
+        super().__init__()
+        self.full_for = full_for
+
+    def put(self, row, timeout=None):
+        if self.full_for:
+            self.full_for -= 1
+            raise TelegramExtractor.QueueFull("Queue is at its limit of 1 items")
+        super().put(row)
+
+
+def test_full_outbox_blocks_instead_of_dropping(extractor, monkeypatch):
+    queue, _ = extractor
+    outbox = FullOutbox(full_for=3)
+    monkeypatch.setattr(TelegramExtractor, "outbox", outbox)
+    TelegramExtractor.enqueue_token(channel_message())
+    process(queue)
+
+    assert len(outbox.rows) == 1
+    assert TelegramExtractor.published_by.get(ADDRESS) == TelegramExtractor.CHANNEL_SOURCE
@@ -0,0 +1,61 @@
+import threading
+import time
+import pytest
+from BlockchainDataPipeline.DurableQueue import DurableQueue, QueueFull
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+
+def test_leased_items_are_replayed_after_a_restart(path):
+    queue = DurableQueue(path)
+    queue.put(["first"])
+    queue.put(["second"])
+    assert [item for _, item in queue.get_batch(10)] == [["first"], ["second"]]
+    # Leased, so not handed out twice while the lease runs
+    assert queue.get_batch(10, timeout=0) == []
+
+    reopened = DurableQueue(path)
+    assert [item for _, item in reopened.get_batch(10)] == [["first"], ["second"]]
+
+
+def test_ack_deletes_for_good(path):
+    queue = DurableQueue(path)
+    queue.put(["first"])
+    queue.put(["second"])
+    batch = queue.get_batch(1)
+    queue.ack([row_id for row_id, _ in batch])
+
+    assert queue.size() == 1
+    reopened = DurableQueue(path)
+    assert [item for _, item in reopened.get_batch(10)] == [["second"]]
+
+
+def test_nack_and_expired_leases_hand_items_out_again(path):
+    queue = DurableQueue(path, lease_seconds=0.2)
+    queue.put(["first"])
+    batch = queue.get_batch(10)
+    queue.nack([row_id for row_id, _ in batch])
+    assert [item for _, item in queue.get_batch(10, timeout=0)] == [["first"]]
+
+    # Leased again and never acked, it comes back once the lease runs out
+    assert queue.get_batch(10, timeout=0) == []
+    assert [item for _, item in queue.get_batch(10, timeout=2)] == [["first"]]
+
+
+def test_put_waits_for_room_at_max_items(path):
+    queue = DurableQueue(path, max_items=2)
+    queue.put(["first"])
+    queue.put(["second"])
+    with pytest.raises(QueueFull):
+        queue.put(["third"], timeout=0.1)
+
+    # An ack makes room and releases a waiting put
+    batch = queue.get_batch(1)
+    threading.Timer(0.2, queue.ack, args=([row_id for row_id, _ in batch],)).start()
+    start = time.monotonic()
+    queue.put(["third"], timeout=5)
+    assert time.monotonic() - start >= 0.15
+    assert queue.size() == 2
@@ -0,0 +1,63 @@
+import asyncio
+from benchmarks.fakes import generate_token_transfers, token_address
+from BlockchainDataPipeline import EnrichmentEngine
+from BlockchainDataPipeline.BlockchainDataHandler import fetch_holders, fetch_top_holders
+from BlockchainDataPipeline.ExplorerClient import ExplorerError
+from BlockchainDataPipeline.TransferSource import transfer_source
+
+
+class StubExplorer:
+    """tokentx answers from a fixed transfer list, recording every request."""
+
+    def __init__(self, transfers):
+        self.transfers = transfers
+        self.requests = []
+
+    def get(self, params):
+        self.requests.append((params["startblock"], params["page"]))
+        matching = [tx for tx in self.transfers if int(tx["blockNumber"]) >= params["startblock"]]
+        page = matching[(params["page"] - 1) * params["offset"]:params["page"] * params["offset"]]
+        if not page:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "message": "OK", "result": page}
+
+
+def ledger_steps():
+    return [step for step in EnrichmentEngine.DEFAULT_STEPS if step.name != "onchain" and "onchain" not in step.depends_on]
+
+
+def test_ledger_steps_share_one_explorer_sync(monkeypatch):
+    address = token_address(0)
+    explorer = StubExplorer(generate_token_transfers(address, 50))
+    monkeypatch.setattr(transfer_source, "client", explorer)
+
+    result = asyncio.run(EnrichmentEngine.enrich(address, ledger_steps()))
+
+    assert explorer.requests == [(0, 1)]
+    assert result.failed == [] and result.timed_out == []
+    assert result.get("holders") > 0
+    assert result.get("top_holders")
+    assert result.get("airdrops")["count"] >= 0
+
+
+class DownExplorer:
+    def get(self, params):
+        raise ExplorerError("Max rate limit reached")
+
+
+def test_explorer_errors_are_not_results(monkeypatch):
+    address = token_address(1)
+    monkeypatch.setattr(transfer_source, "client", DownExplorer())
+
+    assert fetch_holders(address) is None
+    assert fetch_top_holders(address) is None
+    result = asyncio.run(EnrichmentEngine.enrich(address, ledger_steps()))
+    assert result.failed == ["ledger"]
+    assert result.get("holders") is None
+
+    # Nothing about the failure was cached, the next enrichment syncs again
+    explorer = StubExplorer(generate_token_transfers(address, 50))
+    monkeypatch.setattr(transfer_source, "client", explorer)
+    result = asyncio.run(EnrichmentEngine.enrich(address, ledger_steps()))
+    assert explorer.requests == [(0, 1)]
+    assert result.get("holders") > 0
@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fakes import FakeExplorer, generate_token_transfers, token_address
+from BlockchainDataPipeline.ExplorerClient import ExplorerClient
+
+
+def test_identical_queries_in_flight_share_one_request():
+    explorer = FakeExplorer(latency=0.2)
+    client = ExplorerClient(api_url=explorer.start(), api_key="key", rate_per_second=100)
+    params = {"module": "account", "action": "tokentx", "contractaddress": token_address(0), "page": 1, "offset": 100}
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: client.get(params), range(4)))
+        other = client.get(dict(params, page=2))
+    finally:
+        explorer.stop()
+
+    assert explorer.calls["requests"] == 2
+    assert all(response == responses[0] for response in responses)
+    assert responses[0]["result"] == generate_token_transfers(token_address(0), 500)[:100]
+    assert other["result"] == generate_token_transfers(token_address(0), 500)[100:200]
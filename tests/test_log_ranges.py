@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import pytest
+from BlockchainDataPipeline.LogRanges import LogRangeReader, is_range_error
+
+
+class StubNode:
+    """get_logs refusing ranges wider than max_span blocks, or failing with `error`."""
+
+    def __init__(self, max_span=None, error=None):
+        self.max_span = max_span
+        self.error = error
+        self.ranges = []
+        self.eth = SimpleNamespace(get_logs=self.get_logs)
+
+    def get_logs(self, log_filter):
+        span = log_filter["toBlock"] - log_filter["fromBlock"] + 1
+        self.ranges.append(span)
+        if self.error:
+            raise self.error
+        if self.max_span and span > self.max_span:
+            raise ValueError({"code": -32005, "message": "query returned more than 10000 results"})
+        return [{"blockNumber": log_filter["fromBlock"]}]
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("query returned more than 10000 results", True),
+    ("exceed maximum block range: 5000", True),
+    ("Log response size exceeded.", True),
+    ("eth_getLogs is limited to a 10,000 range", True),
+    ("limit exceeded", False),
+    ("429 Client Error: Too Many Requests", False),
+    ("HTTPConnectionPool: Read timed out.", False),
+])
+def test_range_error_classification(message, expected):
+    assert is_range_error(ValueError(message)) is expected
+
+
+def test_refused_range_is_halved_until_accepted():
+    node = StubNode(max_span=300)
+    reader = LogRangeReader(node, max_range=2000)
+
+    to_block, logs = reader.get_logs({}, 1000, 5000)
+
+    assert node.ranges == [2000, 1000, 500, 250]
+    assert to_block == 1249 and logs
+    assert reader.range == 250
+
+
+def test_other_errors_do_not_narrow_the_range():
+    node = StubNode(error=ValueError({"code": -32005, "message": "limit exceeded"}))
+    reader = LogRangeReader(node, max_range=2000)
+
+    with pytest.raises(ValueError):
+        reader.get_logs({}, 1000, 5000)
+    assert node.ranges == [2000]
+    assert reader.range == 2000
+
+
+def test_range_grows_back_after_accepted_calls():
+    node = StubNode(max_span=1000)
+    reader = LogRangeReader(node, max_range=2000, grow_after=3)
+    reader.get_logs({}, 0, 10**6)
+    assert reader.range == 1000
+
+    node.max_span = None
+    for start in range(3):
+        reader.get_logs({}, start * 1000, 10**6)
+    assert reader.range == 2000
@@ -0,0 +1,17 @@
+from BlockchainDataPipeline.Metrics import record_outbound, registry, target_label
+
+KEYED_URL = "https://bsc-mainnet.example.com:8545/v3/s3cr3t-api-key?token=also-secret"
+
+
+def test_target_label_keeps_only_the_host():
+    assert target_label(KEYED_URL) == "bsc-mainnet.example.com:8545"
+    assert target_label("https://api.telegram.org/bot123:ABC/sendMessage") == "api.telegram.org"
+    assert target_label(None) == "unknown"
+
+
+def test_metrics_never_publish_url_keys():
+    record_outbound("rpc", KEYED_URL, "eth_call", 0.01, failed=True)
+
+    rendered = registry.render()
+    assert 'target="bsc-mainnet.example.com:8545"' in rendered
+    assert "s3cr3t" not in rendered and "also-secret" not in rendered
@@ -0,0 +1,20 @@
+from BlockchainDataPipeline.BlockchainDataHandler import BASE_TOKENS, compute_pair_address, resolve_pair_candidates
+
+# PancakeSwap V2 pairs as deployed on BSC mainnet
+WBNB_BUSD_PAIR = "0x58F876857a02D6762E0101bb5C46A8c1ED44Dc16"
+WBNB_USDT_PAIR = "0x16b9a82891338f9bA80E2D6970FddA79D1eb0daE"
+
+
+def test_pair_address_matches_deployed_pair():
+    assert compute_pair_address(BASE_TOKENS["WBNB"], BASE_TOKENS["BUSD"]) == WBNB_BUSD_PAIR
+    assert compute_pair_address(BASE_TOKENS["WBNB"], BASE_TOKENS["USDT"]) == WBNB_USDT_PAIR
+
+
+def test_pair_address_does_not_depend_on_argument_order():
+    assert compute_pair_address(BASE_TOKENS["BUSD"], BASE_TOKENS["WBNB"]) == WBNB_BUSD_PAIR
+
+
+def test_candidates_flag_whether_the_token_is_token0():
+    # WBNB sorts before BUSD but after USDT
+    candidates = resolve_pair_candidates(BASE_TOKENS["WBNB"], {"BUSD": BASE_TOKENS["BUSD"], "USDT": BASE_TOKENS["USDT"]})
+    assert candidates == [("BUSD", WBNB_BUSD_PAIR, True), ("USDT", WBNB_USDT_PAIR, False)]
@@ -0,0 +1,30 @@
+from datetime import datetime
+from BlockchainDataPipeline.TelegramExtractor import _clear_replay_seen, _load_replay_checkpoint, _save_replay_checkpoint
+
+SINCE = datetime(2026, 1, 1)
+UNTIL = datetime(2026, 2, 1)
+
+
+def test_resume_restores_the_contracts_already_sent(tmp_path):
+    path = str(tmp_path / "replay_checkpoint.json")
+    _save_replay_checkpoint(path, SINCE, UNTIL, 900, ["0xaa", "0xbb"])
+    _save_replay_checkpoint(path, SINCE, UNTIL, 800, ["0xcc"])
+
+    assert _load_replay_checkpoint(path, SINCE, None) == (800, UNTIL, {"0xaa", "0xbb", "0xcc"})
+
+
+def test_checkpoint_of_another_range_is_ignored(tmp_path):
+    path = str(tmp_path / "replay_checkpoint.json")
+    _save_replay_checkpoint(path, SINCE, UNTIL, 900, ["0xaa"])
+
+    assert _load_replay_checkpoint(path, datetime(2025, 1, 1), None) == (0, None, set())
+    assert _load_replay_checkpoint(path, SINCE, datetime(2026, 3, 1)) == (0, datetime(2026, 3, 1), set())
+
+
+def test_a_new_replay_starts_without_contracts(tmp_path):
+    path = str(tmp_path / "replay_checkpoint.json")
+    _save_replay_checkpoint(path, SINCE, UNTIL, 900, ["0xaa"])
+    _clear_replay_seen(path)
+    _save_replay_checkpoint(path, SINCE, UNTIL, 950, ["0xdd"])
+
+    assert _load_replay_checkpoint(path, SINCE, UNTIL)[2] == {"0xdd"}
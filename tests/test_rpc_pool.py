@@ -0,0 +1,132 @@
+import json
+import time
+import pytest
+from benchmarks.fakes import FakeServer
+from BlockchainDataPipeline.RpcPool import RpcEndpointPool, EndpointError, _is_endpoint_error
+
+
+class ScriptedNode(FakeServer):
+    """JSON-RPC stand-in answering every request with the same result, error or HTTP status."""
+
+    def __init__(self, result="0x1", error=None, status=200, latency=0.0):
+        super().__init__(latency)
+        self.result, self.error, self.status = result, error, status
+
+    def handle_post(self, path, body):
+        request = json.loads(body)
+        self.count("requests")
+        if self.status != 200:
+            return self.status, {"error": "unavailable"}
+        if self.error:
+            return 200, {"jsonrpc": "2.0", "id": request["id"], "error": self.error}
+        return 200, {"jsonrpc": "2.0", "id": request["id"], "result": self.result}
+
+
+@pytest.fixture
+def nodes():
+    started = []
+
+    def start(**kwargs):
+        node = ScriptedNode(**kwargs)
+        node.url = node.start()
+        started.append(node)
+        return node
+
+    yield start
+    for node in started:
+        node.stop()
+
+
+def pool_for(*nodes, **kwargs):
+    # Untried endpoints all score 0, so they are ranked in the order given
+    return RpcEndpointPool([node.url for node in nodes], timeout=5, **kwargs)
+
+
+def test_fails_over_when_an_endpoint_returns_5xx(nodes):
+    broken, healthy = nodes(status=502), nodes(result="0x2")
+    pool = pool_for(broken, healthy)
+
+    assert pool.make_request("eth_blockNumber", [])["result"] == "0x2"
+    assert broken.calls["requests"] == 1
+    assert pool.endpoints[0].errors == 1
+    # The failure is remembered, the healthy endpoint is now tried first
+    assert pool.ranked_endpoints()[0].url == healthy.url
+
+
+def test_fails_over_when_an_endpoint_rate_limits(nodes):
+    limited = nodes(error={"code": -32005, "message": "limit exceeded"})
+    healthy = nodes(result="0x2")
+
+    assert pool_for(limited, healthy).make_request("eth_call", [{}, "latest"])["result"] == "0x2"
+    assert limited.calls["requests"] == 1
+
+
+def test_a_revert_is_returned_not_retried(nodes):
+    reverting = nodes(error={"code": 3, "message": "execution reverted"})
+    healthy = nodes()
+    pool = pool_for(reverting, healthy)
+
+    response = pool.make_request("eth_call", [{}, "latest"])
+
+    assert response["error"]["message"] == "execution reverted"
+    assert healthy.calls["requests"] == 0
+    assert pool.endpoints[0].errors == 0
+
+
+def test_an_oversized_log_range_is_returned_not_retried(nodes):
+    refusing = nodes(error={"code": -32005, "message": "query returned more than 10000 results"})
+    healthy = nodes()
+    pool = pool_for(refusing, healthy)
+
+    response = pool.make_request("eth_getLogs", [{"fromBlock": "0x0", "toBlock": "0xfffff"}])
+
+    assert "more than 10000 results" in response["error"]["message"]
+    assert healthy.calls["requests"] == 0
+    assert pool.endpoints[0].errors == 0
+
+
+@pytest.mark.parametrize("error, expected", [
+    ({"code": 429, "message": "Too Many Requests"}, True),
+    ({"code": -32005, "message": "request rate exceeded"}, True),
+    ({"code": -32000, "message": "query timeout exceeded"}, True),
+    ({"code": -32603, "message": "execution reverted: transfer amount exceeds limit"}, False),
+    ({"code": 3, "message": "execution reverted"}, False),
+    ({"code": -32602, "message": "invalid argument"}, False),
+    ({"code": -32005, "message": "query returned more than 10000 results"}, False),
+    ({"code": -32005, "message": "limit exceeded"}, True),
+])
+def test_endpoint_error_classification(error, expected):
+    assert _is_endpoint_error({"error": error}) is expected
+
+
+def test_hedged_read_returns_the_faster_endpoint(nodes):
+    slow, fast = nodes(result="0x1", latency=1.0), nodes(result="0x2")
+    pool = pool_for(slow, fast, hedge_after=0.05)
+
+    start = time.monotonic()
+    response = pool.make_request("eth_call", [{}, "latest"])
+
+    assert response["result"] == "0x2"
+    assert time.monotonic() - start < 0.9
+    assert fast.calls["requests"] == 1
+
+
+def test_non_idempotent_methods_are_not_retried(nodes):
+    broken, healthy = nodes(status=500), nodes()
+    pool = pool_for(broken, healthy, hedge_after=0.05)
+
+    with pytest.raises(EndpointError):
+        pool.make_request("eth_sendRawTransaction", ["0x00"])
+    assert broken.calls["requests"] == 1
+    assert healthy.calls["requests"] == 0
+
+
+def test_chain_id_is_asked_once(nodes):
+    node = nodes(result="0x38")
+    pool = pool_for(node)
+
+    responses = [pool.make_request("eth_chainId", []) for _ in range(3)]
+
+    assert [response["result"] for response in responses] == ["0x38"] * 3
+    assert len({response["id"] for response in responses}) == 3
+    assert node.calls["requests"] == 1
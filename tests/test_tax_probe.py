@@ -0,0 +1,54 @@
+import pytest
+from BlockchainDataPipeline.TaxProbe import DENOMINATOR_GETTERS, NO_TAX_GETTER, PROBE_NAMES, detect_taxes, probe_names, tax_percent
+
+
+@pytest.mark.parametrize("value, denominator, expected", [
+    (5, 100, 5.0),
+    (100, 10000, 1.0),
+    (50, 1000, 5.0),
+    (0, None, 0.0),
+    (5, None, None),
+    (100, None, None),
+    (2500, None, None),
+    (200, 100, None),
+    (None, 100, None),
+])
+def test_tax_percent(value, denominator, expected):
+    assert tax_percent(value, denominator) == expected
+
+
+def test_basis_points_with_a_denominator():
+    assert detect_taxes({"buyFee": 100, "sellFee": 300, "feeDenominator": 10000}) == ("buyFee/sellFee/feeDenominator", 1.0, 3.0)
+
+
+def test_per_mille_with_a_denominator():
+    assert detect_taxes({"_buyTax": 50, "_sellTax": 50, "_feeDenominator": 1000}) == ("_buyTax/_sellTax/_feeDenominator", 5.0, 5.0)
+
+
+def test_lone_fee_getter_applies_both_ways():
+    assert detect_taxes({"totalFees": 4, "FEE_DENOMINATOR": 100}) == ("totalFees//FEE_DENOMINATOR", 4.0, 4.0)
+
+
+def test_getters_without_denominator_are_ambiguous():
+    # Found, so it is cached, but 100 could be 100%, 10% or 1%
+    assert detect_taxes({"buyTax": 100, "sellTax": 100}) == ("buyTax/sellTax/", None, None)
+    assert detect_taxes({"buyTax": 0, "sellTax": 0}) == ("buyTax/sellTax/", 0.0, 0.0)
+
+
+def test_first_getter_pair_wins():
+    results = {"buyTax": 2, "sellTax": 3, "buyFee": 9, "sellFee": 9, "feeDenominator": 100}
+    assert detect_taxes(results) == ("buyTax/sellTax/feeDenominator", 2.0, 3.0)
+
+
+def test_no_getter_answered():
+    assert detect_taxes({"feeDenominator": 100}) == (NO_TAX_GETTER, None, None)
+    assert detect_taxes({}) == (NO_TAX_GETTER, None, None)
+
+
+def test_probe_names_follow_the_cached_getter():
+    assert probe_names(None) == PROBE_NAMES
+    assert probe_names(NO_TAX_GETTER) == ()
+    assert probe_names("buyFee/sellFee/feeDenominator") == ("buyFee", "sellFee", "feeDenominator")
+    assert probe_names("totalFees//") == ("totalFees",)
+    # Keys cached before denominators were probed look for one again
+    assert probe_names("buyFee/sellFee") == ("buyFee", "sellFee") + DENOMINATOR_GETTERS
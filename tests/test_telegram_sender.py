@@ -0,0 +1,130 @@
+import asyncio
+from benchmarks.fakes import FakeTelegram
+from BlockchainDataPipeline import LoadToTelegram
+from BlockchainDataPipeline.LoadToTelegram import TelegramSender
+
+
+class FlakyTelegram(FakeTelegram):
+    """Answers the first `failures` sendMessage calls with `status`."""
+
+    def __init__(self, failures, status=502, latency=0.0):
+        super().__init__(latency)
+        self.failures = failures
+        self.status = status
+
+    def handle_post(self, path, body):
+        with self._lock:
+            failing = self.failures > 0
+            self.failures -= 1
+        if failing:
+            self.count("rejected")
+            return self.status, {"ok": False, "description": "Bad Gateway"}
+        return super().handle_post(path, body)
+
+
+def run_sender(telegram, monkeypatch, messages, **kwargs):
+    monkeypatch.setattr(LoadToTelegram, "TELEGRAM_API_URL", telegram.start())
+    options = dict(max_queue=100, workers=2, global_rate=1000, chat_rate=1000, retry_backoff=0.01)
+    options.update(kwargs)
+    sender = TelegramSender(**options)
+
+    async def scenario():
+        await sender.start()
+        for text in messages:
+            sender.enqueue("chat", text)
+        # Stopping right away must still deliver what was queued
+        await sender.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        telegram.stop()
+    return sender
+
+
+def test_5xx_answers_are_retried(monkeypatch):
+    telegram = FlakyTelegram(failures=2)
+    sender = run_sender(telegram, monkeypatch, ["hello"])
+
+    assert [text for _, text in telegram.messages] == ["hello"]
+    assert telegram.calls["rejected"] == 2
+    assert (sender.sent, sender.failed) == (1, 0)
+
+
+def test_4xx_answers_are_not_retried(monkeypatch):
+    telegram = FlakyTelegram(failures=1, status=400)
+    sender = run_sender(telegram, monkeypatch, ["hello"])
+
+    assert telegram.messages == []
+    assert (sender.sent, sender.failed) == (0, 1)
+
+
+def test_transport_errors_are_retried_up_to_max_attempts(monkeypatch):
+    # Nothing listens on the discard port
+    monkeypatch.setattr(LoadToTelegram, "TELEGRAM_API_URL", "http://127.0.0.1:9")
+    sender = TelegramSender(max_queue=10, workers=1, global_rate=1000, chat_rate=1000, max_attempts=3, retry_backoff=0.01)
+    attempts = []
+    original = LoadToTelegram.send_message_to_telegram
+
+    async def counting(client, chat_id, text):
+        attempts.append(text)
+        return await original(client, chat_id, text)
+
+    monkeypatch.setattr(LoadToTelegram, "send_message_to_telegram", counting)
+
+    async def scenario():
+        await sender.start()
+        sender.enqueue("chat", "hello")
+        await sender.stop()
+
+    asyncio.run(scenario())
+    assert len(attempts) == 3
+    assert (sender.sent, sender.failed) == (0, 1)
+
+
+def test_stop_drains_the_queue(monkeypatch):
+    telegram = FakeTelegram(latency=0.02)
+    sender = run_sender(telegram, monkeypatch, [f"message {index}" for index in range(10)], workers=1)
+
+    assert len(telegram.messages) == 10
+    assert sender.sent == 10
+
+
+def test_stop_delivers_coalesced_messages(monkeypatch):
+    telegram = FakeTelegram()
+    # The window outlasts the test, only the flush on stop can send the buffer
+    run_sender(telegram, monkeypatch, ["first", "second"], coalesce_window=60)
+
+    assert len(telegram.messages) == 1
+    assert "first" in telegram.messages[0][1] and "second" in telegram.messages[0][1]
+
+
+def test_coalescing_reserves_a_slot_per_message():
+    sender = TelegramSender(max_queue=3, workers=1, global_rate=1000, chat_rate=1000, coalesce_window=60)
+    sender.coalescer.limit = 10
+
+    async def scenario():
+        assert sender.has_room(3) and not sender.has_room(4)
+        # Every message overflows the buffer and flushes the previous one
+        for text in ["a" * 8, "b" * 8, "c" * 8]:
+            sender.enqueue("chat", text)
+        assert sender.queue.qsize() == 2
+        assert sender.has_room(1) and not sender.has_room(2)
+        for timer in sender.coalescer.timers.values():
+            timer.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_batch_without_room_is_rejected_whole(monkeypatch):
+    from fastapi.testclient import TestClient
+    from BlockchainDataPipeline.WireFormat import TokenAlert
+
+    sender = TelegramSender(max_queue=2, workers=1, global_rate=1000, chat_rate=1000, coalesce_window=60)
+    monkeypatch.setattr(LoadToTelegram, "sender", sender)
+    rows = [TokenAlert(contract_address=f"0x{index:040x}").to_row() for index in range(3)]
+
+    response = TestClient(LoadToTelegram.app).post("/send_to_telegram/batch", json=rows)
+
+    assert response.status_code == 503
+    assert sender.queue.qsize() == 0 and sender.coalescer.buffered() == 0
@@ -0,0 +1,28 @@
+import pytest
+from BlockchainDataPipeline.WireFormat import TokenAlert, Liquidity, Taxes, Holder, Airdrops, WireFormatError, alert_from_item
+
+ALERT = TokenAlert(
+    contract_address="0x" + "ab" * 20,
+    token_pair="ABC/WBNB",
+    liquidity=Liquidity("WBNB", 10.0, 1000.0, 50.0, 6000.0, 30000.0),
+    holders=12,
+    top_holders=(Holder("0x" + "cd" * 20, 500.0),),
+    taxes=Taxes(1.0, 2.0, 3.0),
+    airdrops=Airdrops(2, 0.5, 2),
+)
+
+
+def test_row_round_trip():
+    assert TokenAlert.from_row(ALERT.to_row()) == ALERT
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda row: row[:-1],
+    lambda row: row[:8] + [{"buy": 1, "sell": 2, "total": 3}] + row[9:],
+    lambda row: row[:10] + [{"count": 1}],
+    lambda row: row[:7] + [[["0xcd", "lots"]]] + row[8:],
+    lambda row: row[:7] + [5] + row[8:],
+])
+def test_malformed_rows_raise_wire_format_error(corrupt):
+    with pytest.raises(WireFormatError):
+        alert_from_item(corrupt(ALERT.to_row()))